@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import aiohttp
+from slack_sdk.web.async_client import AsyncWebClient
+
+# WebClient methods the summarizer uses; each gets a blocking wrapper below
+METHODS = (
+    'auth_test',
+    'conversations_list',
+    'conversations_info',
+    'conversations_history',
+    'conversations_replies',
+    'users_list',
+    'users_info',
+    'bots_info',
+)
+
+
+class AsyncSlackClient:
+    """Drop-in for WebClient that sends every call through one pooled AsyncWebClient
+
+    The sync WebClient opens a new HTTPS connection per request. Here one
+    aiohttp session with keep-alive serves all worker threads from a private
+    event loop, and its connector caps how many requests are in flight at
+    once. Methods block like WebClient's, so the rate limiter, retries and
+    thread pools work unchanged and results are identical to the sync path.
+    """
+
+    def __init__(self, token=None, base_url=None, max_connections=16, keepalive_timeout=30, timeout=30):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='slack-async', daemon=True)
+        self.thread.start()
+        self.session = None
+        self.client = self.run(self.open(token, base_url, max_connections, keepalive_timeout, timeout))
+
+    async def open(self, token, base_url, max_connections, keepalive_timeout, timeout):
+        """Create the shared session and client on the event loop"""
+        connector = aiohttp.TCPConnector(limit=max_connections, keepalive_timeout=keepalive_timeout)
+        self.session = aiohttp.ClientSession(connector=connector)
+        kwargs = {'base_url': base_url} if base_url else {}
+        return AsyncWebClient(token=token, session=self.session, timeout=timeout, **kwargs)
+
+    def run(self, coro):
+        """Run a coroutine on the client's loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def request(self, name, kwargs):
+        try:
+            return await getattr(self.client, name)(**kwargs)
+        except aiohttp.ClientError as e:
+            # Surface as OSError so RateLimiter retries it like a urllib failure
+            raise ConnectionError(f"{type(e).__name__}: {e}") from e
+
+    def close(self):
+        """Close the session and stop the event loop"""
+        if self.session is not None:
+            self.run(self.session.close())
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def blocking_method(name):
+    def method(self, **kwargs):
+        return self.run(self.request(name, kwargs))
+    method.__name__ = name
+    method.__doc__ = f"Blocking AsyncWebClient.{name}"
+    return method
+
+
+for _name in METHODS:
+    setattr(AsyncSlackClient, _name, blocking_method(_name))
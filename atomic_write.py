@@ -0,0 +1,20 @@
+import json
+import os
+
+
+def write_json(path, data, **dump_kwargs):
+    """Write data to path as JSON atomically, creating its directory if needed
+
+    The JSON goes to a per-process temporary file that is then renamed over
+    path, so a crash mid-write never leaves a torn file behind. Pretty-printed
+    (indented) files end with a newline.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+        if dump_kwargs.get('indent') is not None:
+            f.write('\n')
+    os.replace(tmp_path, path)
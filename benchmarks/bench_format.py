@@ -0,0 +1,144 @@
+"""Micro-benchmark for SlackSummarizer.format_pieces on a synthetic channel.
+
+Compares the formatter the pipeline uses (per-message pieces, as packed into
+prompt chunks) against the original string-concatenation loop, checks both
+produce identical output, and prints the timings. Needs no Slack or Gemini
+credentials:
+
+    python benchmarks/bench_format.py --messages 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from message_store import MessageRecord  # noqa: E402
+from slack_summarizer import SlackSummarizer, format_minute  # noqa: E402
+from user_directory import UserDirectory  # noqa: E402
+
+
+def make_messages(count, seed=42):
+    """Build a synthetic oldest-first channel with files, reactions, links and threads"""
+    rng = random.Random(seed)
+    start = time.time() - 7 * 24 * 60 * 60
+    messages = []
+    threads = {}
+    ts = start
+    for i in range(count):
+        ts += rng.expovariate(1 / 40.0)
+        msg = {
+            'ts': f"{ts:.6f}",
+            'user': f"U{rng.randrange(50):04d}",
+            'text': ' '.join(rng.choice(['deploy', 'review', 'lgtm', 'ship it', 'bug', 'meeting', 'docs'])
+                             for _ in range(rng.randint(3, 30)))
+        }
+        if i % 50 == 0:
+            msg['subtype'] = 'channel_join'
+        if i % 7 == 0:
+            msg['reactions'] = [{'name': 'thumbsup', 'count': rng.randint(1, 5)}]
+        if i % 23 == 0:
+            msg['files'] = [{'name': f"file{i}.pdf", 'filetype': 'pdf', 'size': rng.randint(100, 5 * 1024 * 1024)}]
+        if i % 31 == 0:
+            msg['attachments'] = [{'title': 'CI build', 'text': 'Build passed on main ' * 5}]
+        if i % 11 == 0:
+            msg['reply_count'] = rng.randint(1, 12)
+            msg['thread_ts'] = msg['ts']
+            threads[msg['ts']] = [
+                {'ts': f"{ts + r + 1:.6f}", 'user': f"U{rng.randrange(50):04d}", 'text': 'reply text ' * 3}
+                for r in range(msg['reply_count'])
+            ]
+        messages.append(msg)
+    return messages, threads
+
+
+def legacy_format_messages(summarizer, messages, channel_name, threads):
+    """The original formatter: repeated += and per-message datetime conversion"""
+    formatted = f"# Channel: {channel_name}\n\n"
+    messages.sort(key=lambda x: float(x.get('ts', 0)))
+    for msg in messages:
+        if msg.get('subtype') in ['channel_join', 'channel_leave', 'channel_archive']:
+            continue
+        user_id = msg.get('user', msg.get('bot_id', 'Unknown'))
+        username = summarizer.get_user_name(user_id)
+        text = msg.get('text', '')
+        timestamp = datetime.fromtimestamp(float(msg.get('ts', 0))).strftime('%Y-%m-%d %H:%M')
+        formatted += f"\n[{timestamp}] **{username}**: {text}\n"
+        if msg.get('files'):
+            for file_data in msg['files']:
+                formatted += f"  {summarizer.format_file_info(file_data)}\n"
+        if msg.get('attachments'):
+            for att in msg['attachments']:
+                if att.get('title'):
+                    formatted += f"  🔗 {att['title']}\n"
+                if att.get('text'):
+                    formatted += f"     {att['text'][:150]}...\n"
+        if msg.get('reactions'):
+            reactions = ', '.join([f"{r['name']}({r['count']})" for r in msg['reactions']])
+            formatted += f"  Reactions: {reactions}\n"
+        thread_replies = threads.get(msg.get('ts'))
+        if thread_replies:
+            reply_count = max(len(thread_replies), msg.get('reply_count', 0))
+            formatted += f"  💬 Thread ({reply_count} replies):\n"
+            for reply in thread_replies[:5]:
+                reply_user = summarizer.get_user_name(reply.get('user', 'Unknown'))
+                reply_text = reply.get('text', '')[:100]
+                formatted += f"    ↳ {reply_user}: {reply_text}\n"
+            if reply_count > 5:
+                formatted += f"    ↳ ... and {reply_count-5} more replies\n"
+    return formatted
+
+
+def format_pieces(summarizer, messages, channel_name, threads):
+    """The pipeline's path: oldest-first records in, pieces joined the way pack_chunks() joins them"""
+    pieces = [f"# Channel: {channel_name}\n\n"]
+    pieces.extend(summarizer.format_pieces(messages, threads))
+    return ''.join(pieces)
+
+
+def best_of(repeat, fn):
+    """Return the fastest wall time of `repeat` calls and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        # Measure cold timestamp formatting every round
+        format_minute.cache_clear()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Bypass __init__: the formatter only needs the user directory
+    summarizer = SlackSummarizer.__new__(SlackSummarizer)
+    summarizer.users = UserDirectory(client=None, limiter=None)
+    summarizer.users.names = {f"U{i:04d}": f"user{i}" for i in range(50)}
+
+    messages, threads = make_messages(args.messages)
+
+    legacy_time, legacy = best_of(args.repeat, lambda: legacy_format_messages(
+        summarizer, list(messages), 'bench', threads))
+    dict_time, current = best_of(args.repeat, lambda: format_pieces(summarizer, messages, 'bench', threads))
+    records = [MessageRecord.from_slack(m) for m in messages]
+    record_threads = {ts: [MessageRecord.from_slack(r) for r in replies] for ts, replies in threads.items()}
+    record_time, from_records = best_of(args.repeat, lambda: format_pieces(summarizer, records, 'bench', record_threads))
+
+    assert legacy == current == from_records, "formatter output changed"
+
+    print(f"📊 format_pieces on {args.messages} messages ({len(current)} chars, best of {args.repeat})")
+    print(f"  legacy (+= concat):     {legacy_time * 1000:8.1f} ms")
+    print(f"  pieces (dicts):         {dict_time * 1000:8.1f} ms  ({legacy_time / dict_time:.2f}x)")
+    print(f"  pieces (store records): {record_time * 1000:8.1f} ms  ({legacy_time / record_time:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""End-to-end benchmark of SlackSummarizer.run against local Slack and Gemini stand-ins.
+
+Serves a synthetic workspace from benchmarks/fake_slack.py, drives the real
+slack_sdk WebClient against it, and swaps Gemini for
+benchmarks/fake_gemini.py. Runs the pipeline cold (empty caches) and then
+warm (same caches, same workspace) and reports wall time, calls per
+endpoint and throughput. Needs no credentials or network:
+
+    python benchmarks/bench_run.py --channels 50 --messages 300 --slack-latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from slack_sdk import WebClient  # noqa: E402
+
+from fake_gemini import FakeGeminiModel  # noqa: E402
+from fake_slack import FakeSlackServer, Workspace  # noqa: E402
+from rate_limiter import DEFAULT_LIMITS, RateLimiter  # noqa: E402
+from slack_summarizer import SlackSummarizer  # noqa: E402
+
+
+def run_once(label, args, server, model, cache_dir):
+    """Run the summarizer once and return its measurements"""
+    server.reset_counters()
+    model.reset_counters()
+
+    if args.rpm:
+        limiter = RateLimiter(limits={method: args.rpm for method in DEFAULT_LIMITS},
+                              default_rate=args.rpm, base_delay=0.1, log=lambda message: None)
+    else:
+        limiter = None
+
+    if args.slack_backend == 'async':
+        # Imported here so the sync benchmark doesn't need aiohttp
+        from async_slack import AsyncSlackClient
+        client = AsyncSlackClient(token='xoxp-bench', base_url=server.base_url, max_connections=args.connections)
+    else:
+        client = WebClient(token='xoxp-bench', base_url=server.base_url)
+    output_file = os.path.join(cache_dir, f"report-{label}.md")
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+        summarizer = SlackSummarizer(client=client, model=model, limiter=limiter)
+        summarizer.run(days_back=args.days, output_file=output_file, max_workers=args.workers,
+                       metrics_file=os.path.join(cache_dir, f"metrics-{label}.json"),
+                       max_llm_calls=args.max_llm_calls)
+        summarizer.close()
+    elapsed = time.perf_counter() - start
+
+    messages = server.workspace.message_count
+    return {
+        'run': label,
+        'wall_seconds': round(elapsed, 3),
+        'channels_per_second': round(len(server.workspace.channels) / elapsed, 2),
+        'messages_per_second': round(messages / elapsed, 1),
+        'slack_calls': dict(sorted(server.calls.items())),
+        'slack_rate_limited': dict(sorted(server.rate_limited.items())),
+        'slack_connections': server.connections,
+        'gemini_calls': model.calls,
+        'gemini_rate_limited': model.rate_limited,
+        'gemini_prompt_chars': model.prompt_chars,
+        'report_bytes': os.path.getsize(output_file),
+        'stages': summarizer.metrics.totals(),
+        'stage_table': summarizer.metrics.format_table(top=5),
+    }
+
+
+def print_result(result):
+    print(f"\n⏱️  {result['run']} run: {result['wall_seconds']:.2f}s "
+          f"({result['channels_per_second']} channels/s, {result['messages_per_second']} messages/s)")
+    for method, count in result['slack_calls'].items():
+        limited = result['slack_rate_limited'].get(method, 0)
+        print(f"    {method:<24} {count:>6} calls" + (f"  ({limited} × 429)" if limited else ""))
+    print(f"    {'(slack connections)':<24} {result['slack_connections']:>6}")
+    print(f"    {'gemini.generate_content':<24} {result['gemini_calls']:>6} calls"
+          + (f"  ({result['gemini_rate_limited']} × 429)" if result['gemini_rate_limited'] else ""))
+    print('\n'.join(f"    {line}" for line in result['stage_table'].splitlines()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=200, help="messages per channel")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--thread-ratio', type=float, default=0.1)
+    parser.add_argument('--bot-ratio', type=float, default=0.05, help="fraction of messages that are bot alerts")
+    parser.add_argument('--idle-ratio', type=float, default=0.0,
+                        help="fraction of channels with no messages inside the window")
+    parser.add_argument('--max-llm-calls', type=int, default=None,
+                        help="Gemini call budget per run (default: unlimited)")
+    parser.add_argument('--slack-latency', type=float, default=0.02, help="seconds per Slack call")
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help="seconds per Gemini call")
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help="seconds per new Slack connection (TCP + TLS handshake)")
+    parser.add_argument('--slack-429', type=float, default=0.0, help="fraction of Slack calls answered with 429")
+    parser.add_argument('--gemini-429', type=float, default=0.0, help="fraction of Gemini calls raising 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--slack-backend', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--connections', type=int, default=16, help="connection pool size for the async backend")
+    parser.add_argument('--rpm', type=int, default=60000,
+                        help="per-method budget for the rate limiter (0 = production Slack tiers)")
+    parser.add_argument('--warm-runs', type=int, default=1, help="re-runs against the warm caches")
+    parser.add_argument('--json', help="write the measurements to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the summarizer's own log")
+    args = parser.parse_args()
+
+    workspace = Workspace(channels=args.channels, messages=args.messages, users=args.users,
+                          days=args.days, thread_ratio=args.thread_ratio, idle_ratio=args.idle_ratio,
+                          bot_ratio=args.bot_ratio)
+    server = FakeSlackServer(workspace, latency=args.slack_latency, rate_limit_ratio=args.slack_429,
+                             retry_after=args.retry_after, connect_latency=args.connect_latency).start()
+    model = FakeGeminiModel(latency=args.gemini_latency, rate_limit_ratio=args.gemini_429)
+
+    cache_dir = tempfile.mkdtemp(prefix='slack-bench-')
+    os.environ['SUMMARIZER_STORE'] = os.path.join(cache_dir, 'messages.db')
+    os.environ['SUMMARIZER_USER_CACHE'] = os.path.join(cache_dir, 'users.json')
+    os.environ['SUMMARIZER_LLM_CACHE'] = os.path.join(cache_dir, 'llm_cache.db')
+    os.environ['SUMMARIZER_MANIFEST'] = os.path.join(cache_dir, 'run_manifest.json')
+
+    print(f"🏗️  Workspace: {args.channels} channels × {args.messages} messages "
+          f"({len(workspace.replies)} threads), {args.workers} worker(s)")
+    results = []
+    try:
+        results.append(run_once('cold', args, server, model, cache_dir))
+        print_result(results[-1])
+        for i in range(args.warm_runs):
+            results.append(run_once(f"warm{i + 1}", args, server, model, cache_dir))
+            print_result(results[-1])
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\n📝 Measurements written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
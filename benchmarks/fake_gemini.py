@@ -0,0 +1,54 @@
+"""Local stand-in for google.generativeai.GenerativeModel."""
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from google.api_core.exceptions import ResourceExhausted
+
+
+class FakeResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=len(prompt) // 4,
+            candidates_token_count=len(text) // 4
+        )
+
+
+class FakeGeminiModel:
+    """generate_content() with configurable latency and 429 (ResourceExhausted) injection"""
+
+    def __init__(self, latency=0.0, latency_per_1k_chars=0.0, rate_limit_ratio=0.0, seed=3):
+        self.model_name = 'models/fake-gemini'
+        self.latency = latency
+        self.latency_per_1k_chars = latency_per_1k_chars
+        self.rate_limit_ratio = rate_limit_ratio
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.rate_limited = 0
+        self.prompt_chars = 0
+        self.lock = threading.Lock()
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls = 0
+            self.rate_limited = 0
+            self.prompt_chars = 0
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            throttle = self.rng.random() < self.rate_limit_ratio
+            if throttle:
+                self.rate_limited += 1
+        time.sleep(self.latency + self.latency_per_1k_chars * len(prompt) / 1000)
+        if throttle:
+            raise ResourceExhausted("429 Resource has been exhausted (fake)")
+        first_line = prompt.strip().splitlines()[0][:80]
+        return FakeResponse(
+            f"## 📊 Overview\n- Fake summary of a {len(prompt)}-character prompt\n\n"
+            f"## 💡 Key Insights\n- Prompt began: {first_line}\n",
+            prompt
+        )
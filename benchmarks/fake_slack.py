@@ -0,0 +1,223 @@
+"""Local stand-in for the Slack Web API, serving a synthetic workspace over HTTP.
+
+Point a real slack_sdk WebClient at it with
+``WebClient(token='xoxp-bench', base_url=server.base_url)`` so the whole
+client path (HTTP, pagination, SlackApiError on 429) is exercised offline.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ['deploy', 'review', 'release', 'bug', 'fix', 'meeting', 'docs', 'roadmap', 'customer',
+         'incident', 'lgtm', 'ship', 'test', 'design', 'budget', 'hiring', 'launch', 'metrics']
+ALERTS = ['CPU', 'disk usage', 'p99 latency', 'error rate', 'queue depth']
+
+
+class Workspace:
+    """Synthetic workspace: N channels of M messages with threads, files and reactions"""
+
+    def __init__(self, channels=20, messages=200, users=50, bots=3, days=7,
+                 thread_ratio=0.1, file_ratio=0.05, reaction_ratio=0.2, idle_ratio=0.0, bot_ratio=0.05, seed=1):
+        rng = random.Random(seed)
+        now = time.time()
+        self.users = [
+            {'id': f"U{i:05d}", 'name': f"user{i}", 'profile': {'display_name': f"User {i}", 'real_name': f"User {i}"}}
+            for i in range(users)
+        ]
+        self.bots = {f"B{i:05d}": {'id': f"B{i:05d}", 'name': f"bot{i}"} for i in range(bots)}
+        self.channels = [
+            {'id': f"C{i:05d}", 'name': f"channel-{i}", 'is_member': True, 'is_archived': False}
+            for i in range(channels)
+        ]
+        self.history = {}
+        self.replies = {}
+        idle = set(rng.sample(range(channels), int(channels * idle_ratio)))
+        for position, channel in enumerate(self.channels):
+            # Idle channels only have messages from before the summary window
+            shift = days * 24 * 60 * 60 if position in idle else 0
+            messages_in_channel = []
+            for _ in range(messages):
+                ts = f"{now - shift - rng.uniform(0, days * 24 * 60 * 60):.6f}"
+                msg = {'type': 'message', 'ts': ts, 'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 40)))}
+                if bots and rng.random() < bot_ratio:
+                    # Bots post templated alerts, like real monitoring/CI integrations
+                    msg['bot_id'] = rng.choice(list(self.bots))
+                    msg['subtype'] = 'bot_message'
+                    msg['text'] = (f"Alert: {rng.choice(ALERTS)} above threshold on host-{rng.randint(1, 20)} "
+                                   f"({rng.randint(80, 99)}%)")
+                else:
+                    msg['user'] = rng.choice(self.users)['id']
+                if rng.random() < reaction_ratio:
+                    msg['reactions'] = [{'name': rng.choice(['+1', 'eyes', 'tada']), 'count': rng.randint(1, 6)}]
+                if rng.random() < file_ratio:
+                    msg['files'] = [{'name': f"doc-{ts}.pdf", 'title': 'Shared doc', 'filetype': 'pdf',
+                                     'size': rng.randint(1000, 5 * 1024 * 1024)}]
+                if rng.random() < thread_ratio:
+                    count = rng.randint(1, 30)
+                    thread = [
+                        {'type': 'message', 'ts': f"{float(ts) + r + 1:.6f}", 'thread_ts': ts,
+                         'user': rng.choice(self.users)['id'],
+                         'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 20)))}
+                        for r in range(count)
+                    ]
+                    msg.update(thread_ts=ts, reply_count=count, latest_reply=thread[-1]['ts'])
+                    self.replies[(channel['id'], ts)] = thread
+                messages_in_channel.append(msg)
+            # conversations.history returns newest first
+            messages_in_channel.sort(key=lambda m: -float(m['ts']))
+            self.history[channel['id']] = messages_in_channel
+
+    @property
+    def message_count(self):
+        return sum(len(messages) for messages in self.history.values())
+
+
+def paginate(items, params, default_limit=100):
+    """Slice items by the cursor/limit params the way Slack does"""
+    limit = int(params.get('limit') or default_limit)
+    start = int(params.get('cursor') or 0)
+    page = items[start:start + limit]
+    next_cursor = str(start + limit) if start + limit < len(items) else ''
+    return page, {'next_cursor': next_cursor}
+
+
+class FakeSlackServer:
+    """Threaded HTTP server implementing the Web API methods the summarizer uses"""
+
+    def __init__(self, workspace, latency=0.0, rate_limit_ratio=0.0, retry_after=1, connect_latency=0.0, seed=2):
+        self.workspace = workspace
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.connections = 0
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls = {}
+        self.rate_limited = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/api/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
+            self.rate_limited.clear()
+            self.connections = 0
+
+    def dispatch(self, method, params):
+        """Return (status, headers, body) for one API call"""
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            throttle = self.rng.random() < self.rate_limit_ratio
+            if throttle:
+                self.rate_limited[method] = self.rate_limited.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttle:
+            return 429, {'Retry-After': str(self.retry_after)}, {'ok': False, 'error': 'ratelimited'}
+
+        ws = self.workspace
+        if method == 'auth.test':
+            return 200, {}, {'ok': True, 'user': 'bench', 'team': 'bench', 'user_id': 'U00000'}
+        if method == 'conversations.list':
+            page, meta = paginate(ws.channels, params)
+            return 200, {}, {'ok': True, 'channels': page, 'response_metadata': meta}
+        if method == 'conversations.info':
+            channel = next((c for c in ws.channels if c['id'] == params.get('channel')), None)
+            if channel is None:
+                return 200, {}, {'ok': False, 'error': 'channel_not_found'}
+            history = ws.history[channel['id']]
+            info = dict(channel, latest=history[0] if history else None)
+            return 200, {}, {'ok': True, 'channel': info}
+        if method == 'conversations.history':
+            history = ws.history.get(params.get('channel'))
+            if history is None:
+                return 200, {}, {'ok': False, 'error': 'channel_not_found'}
+            oldest = float(params.get('oldest') or 0)
+            latest = float(params.get('latest') or 'inf')
+            window = [m for m in history if oldest < float(m['ts']) < latest]
+            page, meta = paginate(window, params)
+            return 200, {}, {'ok': True, 'messages': page, 'has_more': bool(meta['next_cursor']),
+                             'response_metadata': meta}
+        if method == 'conversations.replies':
+            channel, ts = params.get('channel'), params.get('ts')
+            parent = next((m for m in ws.history.get(channel, []) if m['ts'] == ts), None)
+            if parent is None:
+                return 200, {}, {'ok': False, 'error': 'thread_not_found'}
+            page, meta = paginate(ws.replies.get((channel, ts), []), params)
+            # Slack repeats the parent at the top of every page
+            return 200, {}, {'ok': True, 'messages': [parent] + page, 'response_metadata': meta}
+        if method == 'users.list':
+            page, meta = paginate(ws.users, params)
+            return 200, {}, {'ok': True, 'members': page, 'response_metadata': meta}
+        if method == 'users.info':
+            user = next((u for u in ws.users if u['id'] == params.get('user')), None)
+            if user is None:
+                return 200, {}, {'ok': False, 'error': 'user_not_found'}
+            return 200, {}, {'ok': True, 'user': user}
+        if method == 'bots.info':
+            bot = ws.bots.get(params.get('bot'))
+            if bot is None:
+                return 200, {}, {'ok': False, 'error': 'bot_not_found'}
+            return 200, {}, {'ok': True, 'bot': bot}
+        return 200, {}, {'ok': False, 'error': 'unknown_method'}
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                # Charged once per connection, like a TCP + TLS handshake
+                time.sleep(server.connect_latency)
+                with server.lock:
+                    server.connections += 1
+                super().setup()
+
+            def handle_request(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = self.rfile.read(length).decode('utf-8')
+                    if 'json' in (self.headers.get('Content-Type') or ''):
+                        params.update(json.loads(body))
+                    else:
+                        params.update({k: v[0] for k, v in parse_qs(body).items()})
+                method = url.path.rsplit('/', 1)[-1]
+
+                status, headers, payload = server.dispatch(method, params)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = handle_request
+            do_POST = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
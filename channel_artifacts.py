@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+from atomic_write import write_json
+
+
+class ChannelArtifacts:
+    """Per-channel summaries kept between runs, each tagged with a fingerprint of the messages it covers"""
+
+    def __init__(self, directory='summaries/channels', log=print):
+        self.directory = directory
+        self.log = log
+
+    def path(self, channel_id):
+        return os.path.join(self.directory, f"{channel_id}.json")
+
+    def get(self, channel_id):
+        """Return the stored artifact for a channel, or None"""
+        path = self.path(channel_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"  ⚠️  Ignoring unreadable channel artifact {path}: {e}")
+            return None
+
+    def save(self, result, fingerprint):
+        """Write a processed channel's result atomically"""
+        data = {
+            'id': result['id'],
+            'name': result['name'],
+            'fingerprint': fingerprint,
+            'status': result['status'],
+            'message_count': result['message_count'],
+            'summary': result['summary'],
+            'generated_at': time.time()
+        }
+        write_json(self.path(result['id']), data, indent=2, ensure_ascii=False)
+
+    def prune(self, keep_ids):
+        """Delete artifacts of channels that are gone (archived, left); returns how many"""
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        for name in os.listdir(self.directory):
+            channel_id, ext = os.path.splitext(name)
+            if ext == '.json' and channel_id not in keep_ids:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(*parts):
+    """Hash the parts (model, prompt version, prompt text...) into a cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """Persistent content-addressed cache of LLM responses with age and size eviction"""
+
+    def __init__(self, path='.slack_cache/llm_cache.db', max_age_days=30, max_entries=5000):
+        self.path = path
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                )""")
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at > ?",
+                (key, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        """Store a response"""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM responses WHERE created_at <= ?", (time.time() - self.max_age,))
+            self.conn.execute("""
+                DELETE FROM responses WHERE key NOT IN (
+                    SELECT key FROM responses ORDER BY used_at DESC LIMIT ?
+                )""", (self.max_entries,))
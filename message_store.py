@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# The parts of a Slack message that threading, formatting and filtering read
+RECORD_FIELDS = ('ts', 'user', 'bot_id', 'subtype', 'text', 'thread_ts', 'reply_count', 'latest_reply',
+                 'files', 'attachments', 'reactions')
+FILE_KEYS = ('name', 'title', 'filetype', 'size', 'preview')
+# Rows read per query when streaming a channel's history out of the store
+HISTORY_BATCH = 500
+
+
+class MessageRecord(namedtuple('MessageRecord', RECORD_FIELDS, defaults=(None,) * len(RECORD_FIELDS))):
+    """Compact, read-only message: no blocks, and file/attachment text cut to what is shown
+
+    Supports msg.get(key, default) and msg[key] like the Slack dicts it
+    replaces; fields Slack left out are None, and get() treats None as missing.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_slack(cls, msg):
+        """Compact a raw Slack message dict"""
+        files = msg.get('files')
+        if files:
+            files = [{k: f[k] for k in FILE_KEYS if k in f} for f in files]
+            for f in files:
+                if f.get('preview'):
+                    f['preview'] = f['preview'][:200]
+        attachments = msg.get('attachments')
+        if attachments:
+            attachments = [
+                {k: (att[k][:150] if k == 'text' else att[k]) for k in ('title', 'text') if att.get(k)}
+                for att in attachments
+            ]
+        reactions = msg.get('reactions')
+        if reactions:
+            reactions = [{'name': r['name'], 'count': r['count']} for r in reactions]
+        return cls(
+            ts=msg.get('ts'),
+            user=msg.get('user'),
+            bot_id=msg.get('bot_id'),
+            subtype=msg.get('subtype'),
+            text=msg.get('text'),
+            thread_ts=msg.get('thread_ts'),
+            reply_count=msg.get('reply_count'),
+            latest_reply=msg.get('latest_reply'),
+            files=files or None,
+            attachments=attachments or None,
+            reactions=reactions or None
+        )
+
+    @classmethod
+    def from_json(cls, data):
+        """Load a stored record; rows written before records existed hold the raw Slack dict"""
+        value = json.loads(data)
+        return cls.from_slack(value) if isinstance(value, dict) else cls(*value)
+
+    def to_json(self):
+        return json.dumps(self, separators=(',', ':'))
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+def compact(msg):
+    """Return msg as a MessageRecord"""
+    return msg if isinstance(msg, MessageRecord) else MessageRecord.from_slack(msg)
+
+
+class StoredHistory:
+    """Lazy, re-iterable view of a channel's stored messages newer than `oldest`, oldest first
+
+    Each iteration streams records out of SQLite in batches, so a channel's
+    history is never held in memory as a whole.
+    """
+
+    def __init__(self, store, channel_id, oldest):
+        self.store = store
+        self.channel_id = channel_id
+        self.oldest = oldest
+
+    def rows(self):
+        """Yield the stored (ts, ts_num, data) rows, oldest first"""
+        after = (self.oldest, None)
+        while True:
+            batch = self.store.read_batch(self.channel_id, after)
+            yield from batch
+            if len(batch) < HISTORY_BATCH:
+                return
+            after = (batch[-1][1], batch[-1][0])
+
+    def __iter__(self):
+        for ts, ts_num, data in self.rows():
+            yield MessageRecord.from_json(data)
+
+    def fingerprint(self, *salt):
+        """SHA-256 of the messages in the view (and `salt`); changes when any is added, edited or removed"""
+        digest = hashlib.sha256(json.dumps(salt).encode('utf-8'))
+        for ts, ts_num, data in self.rows():
+            digest.update(data.encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def __len__(self):
+        return self.store.activity(self.channel_id, self.oldest)[0]
+
+    def latest_ts(self):
+        """ts of the newest message in the view, or None if it is empty"""
+        return self.store.latest_ts(self.channel_id, self.oldest)
+
+
+class MessageStore:
+    """SQLite-backed store of compact Slack messages indexed by channel and ts"""
+
+    def __init__(self, path='.slack_cache/messages.db'):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by all worker threads, serialised by a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    channel_id TEXT NOT NULL,
+                    ts TEXT NOT NULL,
+                    ts_num REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (channel_id, ts)
+                )""")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_by_time ON messages (channel_id, ts_num)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    channel_id TEXT PRIMARY KEY,
+                    oldest_synced REAL NOT NULL,
+                    latest_ts REAL NOT NULL,
+                    synced_at REAL NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS thread_replies (
+                    channel_id TEXT NOT NULL,
+                    thread_ts TEXT NOT NULL,
+                    latest_reply TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (channel_id, thread_ts)
+                )""")
+
+    def get_sync_state(self, channel_id):
+        """Return (oldest_synced, latest_ts) for a channel, or None if never synced"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT oldest_synced, latest_ts FROM sync_state WHERE channel_id = ?",
+                (channel_id,)
+            ).fetchone()
+        return row
+
+    def save_messages(self, channel_id, messages):
+        """Insert or overwrite (edited) messages as one page of a sync arrives"""
+        rows = [(channel_id, m.ts, float(m.ts), m.to_json()) for m in map(compact, messages) if m.ts]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)", rows)
+
+    def finish_sync(self, channel_id, since, seen, oldest_synced):
+        """Complete a sync of everything newer than `since` whose pages have all been saved
+
+        Stored messages newer than `since` that the sync did not see (`seen`
+        is the set of their ts strings) were deleted in Slack. Until this
+        runs, an interrupted sync leaves the previous sync state in place.
+        """
+        with self.lock, self.conn:
+            stored = self.conn.execute(
+                "SELECT ts FROM messages WHERE channel_id = ? AND ts_num > ?", (channel_id, since)
+            ).fetchall()
+            deleted = [(channel_id, ts) for (ts,) in stored if ts not in seen]
+            self.conn.executemany("DELETE FROM messages WHERE channel_id = ? AND ts = ?", deleted)
+            latest = self.conn.execute(
+                "SELECT MAX(ts_num) FROM messages WHERE channel_id = ?", (channel_id,)
+            ).fetchone()[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (channel_id, oldest_synced, latest if latest is not None else since, time.time())
+            )
+
+    def history(self, channel_id, oldest):
+        """Return a lazy view of stored messages newer than `oldest`, oldest first"""
+        return StoredHistory(self, channel_id, oldest)
+
+    def read_batch(self, channel_id, after):
+        """Up to HISTORY_BATCH (ts, ts_num, data) rows after the (ts_num, ts) position `after`
+
+        A ts of None means "strictly newer than ts_num" (the start of a window).
+        """
+        ts_num, ts = after
+        if ts is None:
+            where, params = "ts_num > ?", (ts_num,)
+        else:
+            where, params = "(ts_num > ? OR (ts_num = ? AND ts > ?))", (ts_num, ts_num, ts)
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT ts, ts_num, data FROM messages WHERE channel_id = ? AND {where} ORDER BY ts_num, ts LIMIT ?",
+                (channel_id,) + params + (HISTORY_BATCH,)
+            ).fetchall()
+
+    def latest_ts(self, channel_id, oldest):
+        """ts of the newest stored message newer than `oldest`, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT ts FROM messages WHERE channel_id = ? AND ts_num > ? ORDER BY ts_num DESC LIMIT 1",
+                (channel_id, oldest)
+            ).fetchone()
+        return row[0] if row else None
+
+    def activity(self, channel_id, oldest):
+        """Return (message_count, stored_bytes, latest_ts) for a channel since `oldest`"""
+        with self.lock:
+            count, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM messages WHERE channel_id = ? AND ts_num > ?",
+                (channel_id, oldest)
+            ).fetchone()
+            latest = self.conn.execute(
+                "SELECT latest_ts FROM sync_state WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        return count, size, latest[0] if latest else None
+
+    def get_thread_replies(self, channel_id, thread_ts, latest_reply):
+        """Return cached replies if the thread hasn't changed since, else None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM thread_replies WHERE channel_id = ? AND thread_ts = ? AND latest_reply = ?",
+                (channel_id, thread_ts, latest_reply)
+            ).fetchone()
+        if not row:
+            return None
+        return [MessageRecord.from_slack(r) if isinstance(r, dict) else MessageRecord(*r) for r in json.loads(row[0])]
+
+    def save_thread_replies(self, channel_id, thread_ts, latest_reply, replies):
+        """Cache a thread's replies under its latest_reply marker"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO thread_replies VALUES (?, ?, ?, ?)",
+                (channel_id, thread_ts, latest_reply, json.dumps([compact(r) for r in replies], separators=(',', ':')))
+            )
+
+    def prune(self, before):
+        """Drop messages older than the `before` timestamp"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE ts_num <= ?", (before,))
+            self.conn.execute(
+                "DELETE FROM thread_replies WHERE CAST(thread_ts AS REAL) <= ?", (before,))
+            self.conn.execute(
+                "UPDATE sync_state SET oldest_synced = ? WHERE oldest_synced < ?", (before, before))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
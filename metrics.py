@@ -0,0 +1,150 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from atomic_write import write_json
+
+# Which pipeline stage each rate-limited API method belongs to
+METHOD_STAGES = {
+    'conversations.list': 'list',
+    'conversations.info': 'list',
+    'conversations.history': 'history',
+    'conversations.replies': 'threads',
+    'users.list': 'users',
+    'users.info': 'users',
+    'bots.info': 'users',
+    'gemini.generate_content': 'llm',
+}
+
+STAGES = ('list', 'history', 'threads', 'users', 'format', 'llm')
+FIELDS = ('seconds', 'calls', 'retries', 'throttle_seconds', 'bytes', 'prompt_tokens', 'response_tokens', 'cache_hits',
+          'filtered', 'bytes_saved')
+
+# Stage/call activity outside any channel (channel listing, user directory load)
+WORKSPACE = '_workspace'
+
+
+class Metrics:
+    """Thread-safe per-channel, per-stage timings and API call counters"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.data = {}
+        self.channel_names = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def channel(self, channel_id, name=None):
+        """Attribute everything recorded on this thread to channel_id"""
+        previous = getattr(self.local, 'channel', None)
+        self.local.channel = channel_id
+        if name:
+            with self.lock:
+                self.channel_names[channel_id] = name
+        try:
+            yield
+        finally:
+            self.local.channel = previous
+
+    def current_channel(self):
+        return getattr(self.local, 'channel', None) or WORKSPACE
+
+    def bind(self, fn):
+        """Wrap fn so it records against the calling thread's channel when run in a pool"""
+        channel_id = self.current_channel()
+
+        def bound(*args, **kwargs):
+            with self.channel(channel_id):
+                return fn(*args, **kwargs)
+        return bound
+
+    def add(self, stage, **values):
+        """Add values to the counters of `stage` for the current channel"""
+        channel_id = self.current_channel()
+        with self.lock:
+            entry = self.data.setdefault(channel_id, {}).setdefault(stage, dict.fromkeys(FIELDS, 0))
+            for field, value in values.items():
+                entry[field] += value
+
+    @contextmanager
+    def timed(self, stage):
+        """Record the wall time of a block against a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, seconds=time.perf_counter() - start)
+
+    def record_api_call(self, method, response, retries, throttle_seconds):
+        """Hook for RateLimiter: count one API call with its payload size and tokens"""
+        values = {'calls': 1, 'retries': retries, 'throttle_seconds': throttle_seconds}
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            values['bytes'] = int(headers.get('Content-Length') or headers.get('content-length') or 0)
+        except (TypeError, ValueError):
+            pass
+        # Gemini responses report their own token usage
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            values['prompt_tokens'] = getattr(usage, 'prompt_token_count', 0) or 0
+            values['response_tokens'] = getattr(usage, 'candidates_token_count', 0) or 0
+        self.add(METHOD_STAGES.get(method, method), **values)
+
+    def totals(self):
+        """Sum every channel into one entry per stage"""
+        totals = {}
+        with self.lock:
+            for stages in self.data.values():
+                for stage, entry in stages.items():
+                    total = totals.setdefault(stage, dict.fromkeys(FIELDS, 0))
+                    for field in FIELDS:
+                        total[field] += entry[field]
+        return totals
+
+    def to_dict(self):
+        with self.lock:
+            channels = {
+                channel_id: {
+                    'name': self.channel_names.get(channel_id),
+                    'seconds': round(sum(e['seconds'] for e in stages.values()), 3),
+                    'stages': {stage: dict(entry) for stage, entry in stages.items()}
+                }
+                for channel_id, stages in self.data.items()
+            }
+        return {
+            'started_at': self.started,
+            'wall_seconds': round(time.time() - self.started, 3),
+            'totals': self.totals(),
+            'channels': channels
+        }
+
+    def write_json(self, path):
+        """Write all metrics to a JSON file atomically"""
+        write_json(path, self.to_dict(), indent=2)
+
+    def format_table(self, top=10):
+        """Render stage totals and the slowest channels as a plain-text table"""
+        lines = [f"{'stage':<10}{'seconds':>10}{'calls':>8}{'cached':>8}{'retries':>9}{'throttled':>11}{'KB':>10}{'tokens in/out':>18}"]
+        totals = self.totals()
+        for stage in STAGES + tuple(s for s in totals if s not in STAGES):
+            if stage not in totals:
+                continue
+            e = totals[stage]
+            lines.append(f"{stage:<10}{e['seconds']:>10.2f}{e['calls']:>8}{e['cache_hits']:>8}{e['retries']:>9}"
+                         f"{e['throttle_seconds']:>10.1f}s{e['bytes'] / 1024:>10.1f}"
+                         f"{e['prompt_tokens']:>10}/{e['response_tokens']:<7}")
+        noise = totals.get('format')
+        if noise and noise['filtered']:
+            lines.append(f"Noise filter: {noise['filtered']} messages folded or dropped, "
+                         f"{noise['bytes_saved'] / 1024:.1f} KB of prompt saved")
+
+        channels = sorted(self.to_dict()['channels'].items(), key=lambda item: -item[1]['seconds'])
+        channels = [(cid, c) for cid, c in channels if cid != WORKSPACE][:top]
+        if channels:
+            lines.append("")
+            lines.append(f"Slowest channels (stage seconds summed across workers):")
+            for channel_id, c in channels:
+                slowest = max(c['stages'].items(), key=lambda item: item[1]['seconds'])[0]
+                lines.append(f"  #{c['name'] or channel_id:<30}{c['seconds']:>8.2f}s  (mostly {slowest})")
+        return '\n'.join(lines)
@@ -0,0 +1,221 @@
+import hashlib
+import re
+import zlib
+from datetime import datetime
+
+# Subtypes that carry no discussion content
+LOW_INFO_SUBTYPES = frozenset([
+    'channel_join', 'channel_leave', 'channel_archive', 'channel_unarchive',
+    'channel_topic', 'channel_purpose', 'channel_name', 'group_join', 'group_leave',
+    'pinned_item', 'unpinned_item', 'bot_add', 'bot_remove', 'reminder_add',
+])
+
+# Default estimated shingle similarity at which a bot post counts as a repeat
+NEAR_DUP_THRESHOLD = 0.75
+# Default gap within which posts from one bot (or a person's verbatim repeats) are folded
+BURST_SECONDS = 600
+
+# Signature slot value for a bin no shingle hashed into
+EMPTY_BIN = 1 << 32
+
+# Words that carry an alert's outcome; posts that differ in them are never folded together
+STATUS_WORDS = frozenset([
+    'fail', 'failed', 'failing', 'failure', 'error', 'errored', 'broken', 'down', 'degraded',
+    'critical', 'warning', 'firing', 'triggered', 'opened', 'incident', 'outage', 'timeout',
+    'aborted', 'cancelled', 'canceled', 'rollback', 'reverted', 'pass', 'passed', 'success',
+    'succeeded', 'successful', 'ok', 'up', 'resolved', 'recovered', 'closed', 'completed', 'fixed',
+])
+# Longest excerpt of a differing folded post quoted in the fold note
+NOTE_TEXT_CHARS = 150
+
+NORMALIZE_RE = re.compile(r"\d+")
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Lower-case text with numbers masked, so 'build #41 failed' matches 'build #42 failed'"""
+    return ' '.join(NORMALIZE_RE.sub('0', text.lower()).split())
+
+
+def status_words(text):
+    """The status words in normalized text, e.g. {'failed'} for 'deploy of api failed'"""
+    return STATUS_WORDS.intersection(WORD_RE.findall(text))
+
+
+def message_text(msg):
+    """Text of a message plus its attachments, which is what alert bots fill in"""
+    parts = [msg.get('text', '')]
+    for att in msg.get('attachments') or ():
+        parts.append(att.get('title', ''))
+        parts.append(att.get('text', ''))
+    return ' '.join(p for p in parts if p)
+
+
+class NoiseFilter:
+    """Drop or fold messages that would only spend prompt space
+
+    Low-information subtypes are dropped. A bot post is folded into an
+    earlier one from the same bot (and counted there) if it is an exact
+    repeat after number masking, or a near repeat whose MinHash-estimated
+    shingle similarity reaches near_dup_threshold and whose status words
+    (failed, resolved, ...) are the same (candidates come from LSH bands,
+    so each message is compared with few). Folds into the bot's previous
+    post within burst_seconds are reported as a burst; what a post says,
+    not its timing, decides whether it is folded. When the folded posts
+    differ from the kept one, the note quotes the latest of them.
+    People's messages are only folded when they repeat the same author's
+    text verbatim within burst_seconds, since numbers and small wording
+    changes there usually carry a decision. Hashing uses crc32 rather than
+    hash() so results are stable across runs. Thread parents and messages
+    with files are always kept.
+    """
+
+    def __init__(self, low_info_subtypes=LOW_INFO_SUBTYPES, near_dup_threshold=NEAR_DUP_THRESHOLD,
+                 burst_seconds=BURST_SECONDS, shingle_size=2, num_bins=32, bands=8, max_candidates=16):
+        self.low_info_subtypes = frozenset(low_info_subtypes)
+        self.near_dup_threshold = near_dup_threshold
+        self.burst_seconds = burst_seconds
+        self.shingle_size = shingle_size
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        # Only the most recent messages in a bucket are compared, bounding the
+        # work per message even when a channel repeats itself a lot
+        self.max_candidates = max_candidates
+
+    def settings(self):
+        """The parameters that decide what gets folded, for fingerprinting results"""
+        return [sorted(self.low_info_subtypes), self.near_dup_threshold, self.burst_seconds,
+                self.shingle_size, self.num_bins, self.bands, self.max_candidates]
+
+    def signature(self, text):
+        """One-permutation MinHash of the word shingles of text, or None if it is too short"""
+        words = WORD_RE.findall(text)
+        k = self.shingle_size
+        if len(words) < k + 2:
+            return None
+        n = self.num_bins
+        bins = [EMPTY_BIN] * n
+        for i in range(len(words) - k + 1):
+            h = zlib.crc32(' '.join(words[i:i + k]).encode('utf-8'))
+            slot, value = h % n, h // n
+            if value < bins[slot]:
+                bins[slot] = value
+        return tuple(bins)
+
+    def similarity(self, a, b):
+        """Estimated Jaccard similarity of two signatures, ignoring bins empty in both"""
+        used = matches = 0
+        for x, y in zip(a, b):
+            if x != EMPTY_BIN or y != EMPTY_BIN:
+                used += 1
+                matches += x == y
+        return matches / used if used else 0.0
+
+    def band_keys(self, author, signature):
+        """LSH bucket keys for a signature, skipping bands with no shingles in them"""
+        rows = self.rows
+        keys = []
+        for b in range(self.bands):
+            band = signature[b * rows:(b + 1) * rows]
+            if any(value != EMPTY_BIN for value in band):
+                keys.append((author, b, band))
+        return keys
+
+    def apply(self, messages):
+        """Filter oldest-first messages; returns (kept, dropped, notes)
+
+        Kept messages that absorbed others are copies with a note appended to
+        their text (notes lists those notes); the input messages are never
+        modified.
+        """
+        kept = []
+        dropped = []
+        folds = {}  # index in kept -> [count, last_ts, kind, latest folded text]
+        exact = {}
+        buckets = {}
+        signatures = []
+        statuses = []
+        burst = None  # (bot_id, index in kept, ts of the latest message in the burst)
+
+        for msg in messages:
+            if msg.get('subtype') in self.low_info_subtypes:
+                dropped.append(msg)
+                burst = None
+                continue
+
+            ts = float(msg.get('ts', 0))
+            author = msg.get('user') or msg.get('bot_id') or ''
+            bot_id = msg.get('bot_id') if msg.get('subtype') == 'bot_message' or not msg.get('user') else None
+            foldable = not msg.get('reply_count') and not msg.get('files')
+            target = None
+
+            raw_text = message_text(msg)
+            text = normalize(raw_text) if bot_id else raw_text
+            key = (author, hashlib.sha1(text.encode('utf-8')).digest())
+            signature = None
+            band_keys = ()
+            status = None
+            if foldable and text:
+                if key in exact:
+                    index = exact[key]
+                    last_ts = folds[index][1] if index in folds else float(kept[index].get('ts', 0))
+                    if bot_id or ts - last_ts <= self.burst_seconds:
+                        target = index
+                elif bot_id:
+                    signature = self.signature(text)
+                    if signature is not None:
+                        status = status_words(text)
+                        band_keys = self.band_keys(author, signature)
+                        checked = set()
+                        for band_key in band_keys:
+                            for candidate in reversed(buckets.get(band_key, ())[-self.max_candidates:]):
+                                if candidate in checked:
+                                    continue
+                                checked.add(candidate)
+                                if (statuses[candidate] == status and
+                                        self.similarity(signature, signatures[candidate]) >= self.near_dup_threshold):
+                                    target = candidate
+                                    break
+                            if target is not None:
+                                break
+
+            if target is not None:
+                dropped.append(msg)
+                in_burst = bot_id and burst and burst[:2] == (bot_id, target) and ts - burst[2] <= self.burst_seconds
+                fold = folds.setdefault(target, [0, ts, 'burst' if in_burst else 'repeat', raw_text])
+                fold[0] += 1
+                if ts >= fold[1]:
+                    fold[1] = ts
+                    fold[3] = raw_text
+                if bot_id:
+                    burst = (bot_id, target, ts)
+                continue
+
+            index = len(kept)
+            kept.append(msg)
+            if text:
+                exact[key] = index
+            signatures.append(signature)
+            statuses.append(status)
+            if signature is not None:
+                for band_key in band_keys:
+                    buckets.setdefault(band_key, []).append(index)
+            burst = (bot_id, index, ts) if bot_id else None
+
+        notes = []
+        for index, (count, last_ts, kind, latest) in folds.items():
+            msg = kept[index]
+            last = datetime.fromtimestamp(last_ts).strftime('%Y-%m-%d %H:%M')
+            if kind == 'burst':
+                note = f" _(+{count} more from this bot, until {last}"
+            else:
+                note = f" _(repeated {count} more time{'s' if count > 1 else ''}, last {last}"
+            if latest != message_text(msg):
+                excerpt = latest if len(latest) <= NOTE_TEXT_CHARS else latest[:NOTE_TEXT_CHARS] + '...'
+                note += f"; latest: {excerpt}"
+            note += ")_"
+            notes.append(note)
+            text = msg.get('text', '') + note
+            kept[index] = msg._replace(text=text) if hasattr(msg, '_replace') else dict(msg, text=text)
+        return kept, dropped, notes
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from slack_sdk.errors import SlackApiError
+
+# Requests per minute for each API method. Slack values follow the published
+# Web API tiers (Tier 2 = 20/min, Tier 3 = 50/min, Tier 4 = 100/min); the
+# Gemini budget matches the free-tier limit for gemini-2.0-flash-lite.
+DEFAULT_LIMITS = {
+    'conversations.list': 20,
+    'conversations.info': 50,
+    'conversations.history': 50,
+    'conversations.replies': 50,
+    'users.info': 100,
+    'users.list': 20,
+    'bots.info': 50,
+    'gemini.generate_content': 30,
+}
+
+# Fallback budget for methods without an explicit entry
+DEFAULT_RATE = 20
+
+# HTTP status codes worth retrying; anything else fails immediately
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1, rate_per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token up front so concurrent callers queue fairly
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate if self.tokens < 0 else 0.0,
+                       self.blocked_until - now)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block_for(self, seconds):
+        """Stop handing out tokens for the given number of seconds"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """Per-method rate limiting and retries shared by all Slack and Gemini calls"""
+
+    def __init__(self, limits=None, max_retries=5, base_delay=1.0, max_delay=60.0, log=print,
+                 default_rate=DEFAULT_RATE, metrics=None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.log = log
+        self.buckets = {}
+        self.lock = threading.Lock()
+        # Optional metrics.Metrics that is told about every completed call
+        self.metrics = metrics
+
+    def bucket(self, method):
+        """Get (or lazily create) the bucket for an API method"""
+        with self.lock:
+            if method not in self.buckets:
+                self.buckets[method] = TokenBucket(self.limits.get(method, self.default_rate))
+            return self.buckets[method]
+
+    def share(self, parts):
+        """Keep 1/parts of every budget, for processes that share one token or API key"""
+        with self.lock:
+            self.limits = {method: max(1, rate / parts) for method, rate in self.limits.items()}
+            self.default_rate = max(1, self.default_rate / parts)
+            self.buckets = {}
+
+    def backoff(self, attempt):
+        """Jittered exponential backoff ("full jitter") for the given attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def retry_delay(self, error, attempt):
+        """Return seconds to wait before retrying, or None if error is not retryable"""
+        if isinstance(error, SlackApiError):
+            response = error.response
+            status = getattr(response, 'status_code', None)
+            if status == 429:
+                retry_after = (getattr(response, 'headers', None) or {}).get('Retry-After')
+                try:
+                    return float(retry_after) + random.uniform(0, 1)
+                except (TypeError, ValueError):
+                    return self.backoff(attempt)
+            if status in RETRYABLE_STATUS:
+                return self.backoff(attempt)
+            return None
+        # google.api_core exceptions expose the HTTP status as .code
+        status = getattr(error, 'code', None)
+        if isinstance(status, int) and status in RETRYABLE_STATUS:
+            return self.backoff(attempt)
+        # Connection resets, timeouts and URLError are all OSError subclasses
+        if isinstance(error, OSError):
+            return self.backoff(attempt)
+        return None
+
+    def call(self, method, fn, *args, **kwargs):
+        """Call fn under the budget for method, retrying rate limits and transient errors"""
+        bucket = self.bucket(method)
+        throttled = 0.0
+        for attempt in range(self.max_retries + 1):
+            throttled += bucket.acquire()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    if self.metrics:
+                        self.metrics.record_api_call(method, None, attempt, throttled)
+                    raise
+                self.log(f"  ⏳ {method} throttled/failed ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                bucket.block_for(delay)
+                continue
+            if self.metrics:
+                self.metrics.record_api_call(method, response, attempt, throttled)
+            return response
+
+    def pages(self, method, fn, **kwargs):
+        """Yield each page of a cursor-paginated Slack method, throttling every request"""
+        cursor = None
+        while True:
+            response = self.call(method, fn, cursor=cursor, **kwargs)
+            yield response
+            cursor = response.get('response_metadata', {}).get('next_cursor')
+            if not cursor:
+                return
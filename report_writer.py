@@ -0,0 +1,123 @@
+import os
+import re
+import shutil
+from datetime import datetime
+
+# HTML comments are invisible in rendered markdown, so the report can carry
+# enough state to be resumed without a separate file
+HEADER_MARKER = "<!-- report days_back={days_back} -->\n"
+SECTION_MARKER = "<!-- section channel={channel_id} status={status} messages={message_count} -->\n"
+COMPLETE_MARKER = "<!-- report complete -->\n"
+
+HEADER_RE = re.compile(r"<!-- report days_back=(\d+) -->\n")
+SECTION_RE = re.compile(r"<!-- section channel=(\S+) status=(\S+) messages=(\d+) -->\n")
+
+
+class ReportWriter:
+    """Append-only markdown report that is flushed to disk one channel section at a time"""
+
+    def __init__(self, path, log=print):
+        self.path = path
+        self.log = log
+        self.file = None
+        # channel_id -> (status, message_count) for every section on disk
+        self.completed = {}
+
+    def open(self, header_lines, days_back, resume=False):
+        """Start a new report, or continue a partial one; returns True if resumed"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume and self.load_partial(days_back):
+            self.file = open(self.path, 'a', encoding='utf-8')
+            self.log(f"↩️  Resuming {self.path}: {len(self.completed)} channel(s) already written")
+            return True
+
+        self.completed = {}
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.write(header_lines + [HEADER_MARKER.format(days_back=days_back)])
+        return False
+
+    def load_partial(self, days_back):
+        """Read completed sections from an unfinished report and drop any torn tail"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        header = HEADER_RE.search(content)
+        if not header or int(header.group(1)) != days_back or COMPLETE_MARKER in content:
+            return False
+
+        end = header.end()
+        for match in SECTION_RE.finditer(content):
+            if match.group(2) == 'failed':
+                # Everything from the first failed summary on is regenerated
+                break
+            self.completed[match.group(1)] = (match.group(2), int(match.group(3)))
+            end = match.end()
+
+        # Anything after the last good section marker is rewritten: a failed
+        # summary, or a section that was being written when the process died
+        with open(self.path, 'r+', encoding='utf-8') as f:
+            f.truncate(len(content[:end].encode('utf-8')))
+        return True
+
+    def write(self, lines):
+        """Append lines and push them to disk"""
+        self.file.writelines(lines)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def write_section(self, channel_id, status, message_count, lines):
+        """Append one finished channel section"""
+        self.write(lines + [SECTION_MARKER.format(
+            channel_id=channel_id, status=status, message_count=message_count)])
+        self.completed[channel_id] = (status, message_count)
+
+    def stats(self):
+        """Return (channels_processed, total_messages) across all written sections"""
+        summarized = [count for status, count in self.completed.values() if status in ('summarized', 'failed')]
+        return len(summarized), sum(summarized)
+
+    def finish(self, footer_lines):
+        """Append the footer, mark the report complete and close it"""
+        self.write(footer_lines + [COMPLETE_MARKER])
+        self.file.close()
+        self.file = None
+
+
+def is_partial_report(path):
+    """Whether path holds a report that was started but never finished (so it can be resumed)"""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return bool(HEADER_RE.search(content)) and COMPLETE_MARKER not in content
+
+
+def render_channel_section(result, days_back=7):
+    """Render a processed channel as report lines"""
+    lines = [f"## #{result['name']}\n\n"]
+    if result['status'] == 'empty':
+        lines.append(f"⚠️ No messages in the last {days_back} days\n\n")
+    elif result['status'] == 'system_only':
+        lines.append(f"**Messages found:** {result['message_count']} (all were system messages)\n\n")
+    elif result['status'] == 'over_budget':
+        lines.append(f"**Message Count:** {result['message_count']}\n\n")
+        lines.append("⏭️ Summary skipped: the LLM call budget went to more active channels\n\n")
+    else:
+        lines.append(f"**Message Count:** {result['message_count']}\n\n")
+        lines.append(f"{result['summary']}\n\n")
+    lines.append("---\n\n")
+    return lines
+
+
+def archive_report(path, directory='summaries/history', when=None):
+    """Copy a finished report to a dated file (one per day; a re-run replaces that day's copy)"""
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    dest = os.path.join(directory, f"{stem}-{(when or datetime.now()).strftime('%Y-%m-%d')}.md")
+    shutil.copyfile(path, dest)
+    return dest
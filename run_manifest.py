@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+import time
+
+from atomic_write import write_json
+
+# Per-channel progress, in pipeline order
+STATES = ('pending', 'fetched', 'formatted', 'summarized', 'written')
+# Unfinished runs older than this are started over rather than resumed
+RESUME_MAX_AGE = 6 * 60 * 60
+
+
+class RunManifest:
+    """On-disk record of how far each channel got in the current run"""
+
+    def __init__(self, path='.slack_cache/run_manifest.json', log=print, max_age=RESUME_MAX_AGE):
+        self.path = path
+        self.log = log
+        self.max_age = max_age
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def start(self, days_back, oldest, resume=False):
+        """Begin a run, continuing the previous one if it was unfinished; returns True if resumed"""
+        if resume and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                self.log(f"  ⚠️  Ignoring unreadable run manifest: {e}")
+                previous = {}
+            started = previous.get('started_at', 0)
+            if previous and not previous.get('completed') and time.time() - started > self.max_age:
+                # A scheduled run always passes --resume; yesterday's failure must not pin today's window
+                self.log(f"  ⚠️  Not resuming the unfinished run from "
+                         f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}: "
+                         f"older than {self.max_age / 3600:g} hours")
+            elif not previous.get('completed') and previous.get('days_back') == days_back:
+                self.data = previous
+                done = sum(1 for c in self.data['channels'].values() if self.reached(c, 'summarized'))
+                self.log(f"↩️  Resuming run from {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.data['started_at']))}: "
+                         f"{done}/{len(self.data['channels'])} channel(s) already summarized")
+                return True
+
+        self.data = {
+            'started_at': time.time(),
+            'days_back': days_back,
+            'oldest': oldest,
+            'completed': False,
+            'channels': {}
+        }
+        self.save()
+        return False
+
+    @property
+    def oldest(self):
+        """Start of the summary window; fixed for the lifetime of a run"""
+        return self.data['oldest']
+
+    @staticmethod
+    def reached(entry, state):
+        """Whether a channel entry has got at least as far as state"""
+        return STATES.index(entry.get('state', 'pending')) >= STATES.index(state)
+
+    def get(self, channel_id):
+        """Return a copy of the entry for a channel"""
+        with self.lock:
+            return dict(self.data['channels'].get(channel_id, {'state': 'pending'}))
+
+    def update(self, channel_id, state, **fields):
+        """Advance a channel to state, recording any extra fields, and persist"""
+        with self.lock:
+            entry = self.data['channels'].setdefault(channel_id, {'state': 'pending'})
+            entry.update(fields)
+            entry['state'] = state
+            entry['updated_at'] = time.time()
+        self.save()
+
+    def complete(self):
+        """Mark the run as finished so the next --resume starts fresh"""
+        with self.lock:
+            self.data['completed'] = True
+        self.save()
+
+    def save(self):
+        """Write the manifest atomically"""
+        with self.lock:
+            write_json(self.path, self.data)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from atomic_write import write_json
+from report_writer import ReportWriter, render_channel_section
+
+
+def shard_for(channel_id, shard_count):
+    """Deterministically map a channel ID to a shard (stable across processes and runners)"""
+    digest = hashlib.sha1(channel_id.encode('utf-8')).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def select_shard(channels, shard_index, shard_count):
+    """Return (position, channel) pairs for this shard, positions counted over all channels"""
+    return [
+        (position, channel)
+        for position, channel in enumerate(channels, 1)
+        if shard_for(channel['id'], shard_count) == shard_index
+    ]
+
+
+def default_partial_path(workspace, shard_index, shard_count, directory='summaries/partials'):
+    """Where a shard writes its partial result unless told otherwise"""
+    return os.path.join(directory, f"{workspace or 'default'}-shard-{shard_index}-of-{shard_count}.json")
+
+
+def write_partial(path, workspace, shard_index, shard_count, days_back, oldest, total_channels, results):
+    """Write one shard's channel results for merge_partials"""
+    data = {
+        'workspace': workspace or 'default',
+        'shard_index': shard_index,
+        'shard_count': shard_count,
+        'days_back': days_back,
+        'oldest': oldest,
+        'generated_at': datetime.now().timestamp(),
+        'total_channels': total_channels,
+        'channels': sorted(results, key=lambda r: r['position'])
+    }
+    write_json(path, data)
+    return path
+
+
+def merge_partials(paths, output_file, log=print, digest=None):
+    """Combine shard partials (from one or more workspaces) into one ordered report
+
+    `digest`, if given, is called with every channel result and days_back and
+    returns report lines to put before the statistics (see
+    SlackSummarizer.digest_section).
+    """
+    workspaces = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        workspaces.setdefault(partial['workspace'], []).append(partial)
+
+    if not workspaces:
+        raise ValueError("No partial results to merge")
+
+    days_back = max(p['days_back'] for parts in workspaces.values() for p in parts)
+    oldest = min(p['oldest'] for parts in workspaces.values() for p in parts)
+    total_channels = sum(parts[0]['total_channels'] for parts in workspaces.values())
+
+    date_range = f"{datetime.fromtimestamp(oldest).strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}"
+    header = [
+        f"# 📊 Slack Weekly Summary Report\n\n",
+        f"**📅 Period:** {date_range}\n",
+        f"**🕐 Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+        f"**📢 Total Channels Found:** {total_channels}\n\n",
+        "---\n\n"
+    ]
+    writer = ReportWriter(output_file, log=log)
+    writer.open(header, days_back)
+
+    warnings = []
+    per_workspace = []
+    merged = []
+    for workspace, parts in workspaces.items():
+        shard_count = parts[0]['shard_count']
+        seen = {p['shard_index'] for p in parts}
+        missing = sorted(set(range(shard_count)) - seen)
+        if missing:
+            warnings.append(f"Workspace {workspace}: missing shard(s) {', '.join(map(str, missing))} of {shard_count}")
+        if any(p['shard_count'] != shard_count for p in parts):
+            warnings.append(f"Workspace {workspace}: partials disagree on shard count")
+
+        if len(workspaces) > 1:
+            writer.write([f"# 🏢 Workspace: {workspace}\n\n"])
+
+        # Positions come from the full channel list, so sorting restores the
+        # order an unsharded run would have produced
+        results = sorted((r for p in parts for r in p['channels']), key=lambda r: r['position'])
+        before = writer.stats()
+        for result in results:
+            writer.write_section(
+                f"{workspace}:{result['id']}",
+                result['status'],
+                result['message_count'],
+                render_channel_section(result, days_back)
+            )
+            name = f"{workspace}/{result['name']}" if len(workspaces) > 1 else result['name']
+            merged.append(dict(result, name=name))
+        after = writer.stats()
+        per_workspace.append((workspace, parts[0]['total_channels'], after[0] - before[0], after[1] - before[1]))
+
+    channels_processed, total_messages = writer.stats()
+    footer = digest(merged, days_back) if digest else []
+    footer += [
+        f"\n## 📈 Summary Statistics\n\n",
+        f"- **Total Channels Found:** {total_channels}\n",
+        f"- **Channels Processed:** {channels_processed}\n",
+        f"- **Total Messages Analyzed:** {total_messages}\n",
+        f"- **Average Messages per Channel:** {total_messages/channels_processed if channels_processed > 0 else 0:.1f}\n",
+        f"- **Partials Merged:** {len(paths)}\n\n",
+    ]
+    if len(workspaces) > 1:
+        footer.append("| Workspace | Channels | Processed | Messages |\n|---|---:|---:|---:|\n")
+        footer.extend(f"| {ws} | {found} | {processed} | {messages} |\n" for ws, found, processed, messages in per_workspace)
+        footer.append("\n")
+    if warnings:
+        footer.append("**⚠️ Merge warnings:**\n")
+        footer.extend(f"- {w}\n" for w in warnings)
+        footer.append("\n")
+    writer.finish(footer)
+
+    for w in warnings:
+        log(f"⚠️  {w}")
+    log(f"✅ Merged {len(paths)} partial(s) into {output_file}: "
+        f"{channels_processed} channels, {total_messages} messages")
+    return output_file
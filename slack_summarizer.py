@@ -1,29 +1,162 @@
+import argparse
+import fnmatch
+import math
 import os
 import json
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-import google.generativeai as genai
-import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from channel_artifacts import ChannelArtifacts
+from llm_cache import LLMCache, cache_key
+from itertools import islice
+from message_store import MessageRecord, MessageStore
+from metrics import Metrics
+from noise_filter import BURST_SECONDS, LOW_INFO_SUBTYPES, NEAR_DUP_THRESHOLD, NoiseFilter
+from rate_limiter import RateLimiter
+from report_writer import ReportWriter, archive_report, is_partial_report, render_channel_section
+from run_manifest import RunManifest
+from sharding import default_partial_path, merge_partials, select_shard, write_partial
+from user_directory import UserDirectory
+
+# How far back an incremental sync re-reads to catch edited/deleted messages
+SYNC_OVERLAP_SECONDS = 24 * 60 * 60
+# Messages older than this are dropped from the local store
+STORE_RETENTION_DAYS = 90
+# Bump whenever the summary/chunk prompts change so cached responses are not reused
+PROMPT_VERSION = 1
+# Prefix of the placeholder written when Gemini could not produce a summary
+SUMMARY_ERROR_PREFIX = "⚠️ Error generating summary"
+# Log lines kept in memory for the report's debug section
+DEBUG_LOG_LIMIT = 1000
+
+# Membership/archive notices carry no discussion content
+SKIP_SUBTYPES = frozenset(['channel_join', 'channel_leave', 'channel_archive'])
+# Estimated characters per line of a thread preview not fetched yet (--estimate)
+THREAD_LINE_CHARS = 110
+
+
+@lru_cache(maxsize=65536)
+def format_minute(minute):
+    """Format a Unix minute as local 'YYYY-MM-DD HH:MM' (cached; chat bursts share minutes)"""
+    return datetime.fromtimestamp(minute * 60).strftime('%Y-%m-%d %H:%M')
+
+
+def filter_channels(channels, include=None, exclude=None):
+    """Keep channels whose name or ID matches an include pattern and no exclude pattern
+    
+    Patterns are shell-style globs ('eng-*', 'C0123*'); a leading '#' is ignored.
+    """
+    def matches(channel, patterns):
+        return any(
+            fnmatch.fnmatchcase(channel['name'], p.lstrip('#')) or fnmatch.fnmatchcase(channel['id'], p.lstrip('#'))
+            for p in patterns
+        )
+    return [
+        ch for ch in channels
+        if (not include or matches(ch, include)) and not (exclude and matches(ch, exclude))
+    ]
+
 
 class SlackSummarizer:
-    def __init__(self):
-        self.slack_token = os.environ.get('SLACK_USER_TOKEN')
+    def __init__(self, client=None, model=None, limiter=None, token_env='SLACK_USER_TOKEN', cache_dir=None,
+                 backend=None):
+        """Set up API clients; `client`, `model` and `limiter` can be injected (e.g. benchmarks)
+        
+        `backend` picks the Slack client when none is injected: 'sync' (WebClient)
+        or 'async' (pooled AsyncWebClient); default $SUMMARIZER_SLACK_BACKEND or sync.
+        The Gemini model is only created (and its SDK imported) on first use.
+        """
+        self.slack_token = os.environ.get(token_env)
+        # Local state (message store, caches, manifest); one directory per workspace
+        self.cache_dir = cache_dir or os.environ.get('SUMMARIZER_CACHE_DIR', '.slack_cache')
         self.gemini_key = os.environ.get('GEMINI_API_KEY')
         
-        if not self.slack_token or not self.gemini_key:
+        if client is None and not self.slack_token:
             raise ValueError("Missing required environment variables")
         
-        self.client = WebClient(token=self.slack_token)
-        genai.configure(api_key=self.gemini_key)
-        self.user_cache = {}
-        self.debug_log = []
+        backend = backend or os.environ.get('SUMMARIZER_SLACK_BACKEND', 'sync')
+        if client is None and backend == 'async':
+            # Imported here so aiohttp is only needed when the async backend is used
+            from async_slack import AsyncSlackClient
+            client = AsyncSlackClient(
+                token=self.slack_token,
+                max_connections=int(os.environ.get('SUMMARIZER_SLACK_CONCURRENCY', '16'))
+            )
+        elif client is None and backend != 'sync':
+            raise ValueError(f"Unknown Slack backend: {backend}")
+        self.client = client or WebClient(token=self.slack_token)
+        self.debug_log = deque(maxlen=DEBUG_LOG_LIMIT)
+        self.metrics = Metrics()
+        self.limiter = limiter or RateLimiter(
+            limits={'gemini.generate_content': int(os.environ.get('GEMINI_RPM', '30'))},
+            log=self.log
+        )
+        if self.limiter.metrics is None:
+            self.limiter.metrics = self.metrics
+        self.store = MessageStore(os.environ.get('SUMMARIZER_STORE', os.path.join(self.cache_dir, 'messages.db')))
+        self.max_thread_replies = int(os.environ.get('SUMMARIZER_MAX_THREAD_REPLIES', '200'))
+        self.thread_workers = int(os.environ.get('SUMMARIZER_THREAD_WORKERS', '4'))
+        # Transcripts longer than this are summarized in parallel chunks
+        self.chunk_tokens = int(os.environ.get('SUMMARIZER_CHUNK_TOKENS', '6000'))
+        self.chunk_workers = int(os.environ.get('SUMMARIZER_CHUNK_WORKERS', '4'))
+        # Repeats, near-duplicates and bot bursts are folded before prompting (SUMMARIZER_NOISE_FILTER=0 disables)
+        self.noise_filter = None
+        if os.environ.get('SUMMARIZER_NOISE_FILTER', '1') != '0':
+            drop_subtypes = os.environ.get('SUMMARIZER_DROP_SUBTYPES')
+            self.noise_filter = NoiseFilter(
+                low_info_subtypes=drop_subtypes.split(',') if drop_subtypes else LOW_INFO_SUBTYPES,
+                near_dup_threshold=float(os.environ.get('SUMMARIZER_NEAR_DUP_THRESHOLD', NEAR_DUP_THRESHOLD)),
+                burst_seconds=int(os.environ.get('SUMMARIZER_BOT_BURST_SECONDS', BURST_SECONDS))
+            )
+        # Channel summaries beyond this are digested in groups before the final digest
+        self.digest_tokens = int(os.environ.get('SUMMARIZER_DIGEST_TOKENS', '30000'))
+        # Per-run Gemini call cap (None = unlimited) and the activity plan from plan_channels()
+        self.max_llm_calls = None
+        self.llm_calls = 0
+        self.llm_lock = threading.Lock()
+        self.channel_plan = {}
+        # Per-channel summaries reused across runs (incremental mode only)
+        self.artifacts = None
+        self.llm_cache = LLMCache(os.environ.get('SUMMARIZER_LLM_CACHE', os.path.join(self.cache_dir, 'llm_cache.db')))
+        self.manifest = RunManifest(
+            os.environ.get('SUMMARIZER_MANIFEST', os.path.join(self.cache_dir, 'run_manifest.json')),
+            log=self.log,
+            max_age=float(os.environ.get('SUMMARIZER_RESUME_MAX_HOURS', '6')) * 60 * 60
+        )
+        self.users = UserDirectory(
+            self.client,
+            self.limiter,
+            path=os.environ.get('SUMMARIZER_USER_CACHE', os.path.join(self.cache_dir, 'users.json')),
+            log=self.log
+        )
         
         # Use gemini-2.0-flash-lite (fast and efficient)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        self.log(f"✅ Using model: gemini-2.0-flash-lite")
-        self.user_cache = {}
-        self.debug_log = []
+        self.model_name = 'gemini-2.0-flash-lite'
+        self.model = model
+        
+    def get_model(self):
+        """Return the Gemini model, importing and configuring the SDK on first use"""
+        with self.llm_lock:
+            if self.model is None:
+                if not self.gemini_key:
+                    raise ValueError("Missing required environment variables")
+                # Imported here so listing, --estimate and --merge without a
+                # digest don't pay for loading the Gemini SDK
+                import google.generativeai as genai
+                genai.configure(api_key=self.gemini_key)
+                self.model = genai.GenerativeModel(self.model_name)
+                self.log(f"✅ Using model: {self.model_name}")
+            return self.model
+        
+    def close(self):
+        """Release the Slack client's connections (async backend) and the message store"""
+        if hasattr(self.client, 'close'):
+            self.client.close()
+        self.store.close()
         
     def log(self, message):
         """Log messages for debugging"""
@@ -34,20 +167,16 @@ class SlackSummarizer:
         """Get list of all channels the user is a member of"""
         all_channels = []
         try:
-            cursor = None
-            while True:
-                response = self.client.conversations_list(
+            with self.metrics.timed('list'):
+                for response in self.limiter.pages(
+                    'conversations.list',
+                    self.client.conversations_list,
                     types="public_channel,private_channel",
                     exclude_archived=True,
-                    limit=200,
-                    cursor=cursor
-                )
-                all_channels.extend(response['channels'])
-                
-                cursor = response.get('response_metadata', {}).get('next_cursor')
-                if not cursor:
-                    break
-                    
+                    limit=200
+                ):
+                    all_channels.extend(response['channels'])
+            
             self.log(f"Total channels found: {len(all_channels)}")
             member_channels = [c for c in all_channels if c.get('is_member', False)]
             self.log(f"Channels you're a member of: {len(member_channels)}")
@@ -64,61 +193,193 @@ class SlackSummarizer:
             return []
     
     def get_user_name(self, user_id):
-        """Get user's display name with caching"""
-        if user_id in self.user_cache:
-            return self.user_cache[user_id]
-            
+        """Get user's display name from the preloaded user directory"""
+        return self.users.name(user_id)
+    
+    def channel_activity(self, channel_id, oldest):
+        """Return (message_count, stored_bytes, latest_ts) for a channel without fetching history
+        
+        Channels the store has seen active since `oldest` cost nothing; the rest
+        cost one conversations.info call. latest_ts is None when unknown.
+        """
+        count, size, latest = self.store.activity(channel_id, oldest)
+        if latest is not None and latest > oldest:
+            return count, size, latest
         try:
-            response = self.client.users_info(user=user_id)
-            user = response['user']
-            name = user['profile'].get('display_name') or user['profile'].get('real_name') or user['name']
-            self.user_cache[user_id] = name
-            return name
-        except SlackApiError:
-            self.user_cache[user_id] = user_id
-            return user_id
-    
-    def fetch_messages(self, channel_id, days_back=7):
-        """Fetch messages from the last N days with all metadata"""
-        oldest = (datetime.now() - timedelta(days=days_back)).timestamp()
-        messages = []
+            response = self.limiter.call('conversations.info', self.client.conversations_info, channel=channel_id)
+        except SlackApiError as e:
+            self.log(f"  ⚠️  Could not check activity of {channel_id}: {e}")
+            return count, size, None
+        # Only the newest message proves a channel is quiet; last_read is the
+        # user's read cursor, and unread messages can be newer, so without
+        # `latest` the channel's activity is unknown
+        newest = (response['channel'].get('latest') or {}).get('ts')
+        if not newest:
+            return count, size, None
+        return count, size, max(latest or 0, float(newest))
+    
+    def estimate_llm_calls(self, stored_bytes):
+        """Rough number of Gemini calls a channel will need, from the size of its stored messages"""
+        # Stored (compact) messages are a little larger than their formatted transcript
+        chunks = max(1, math.ceil(stored_bytes / 5 / self.chunk_tokens))
+        return 1 if chunks == 1 else chunks + 1
+    
+    def plan_channels(self, channels, oldest, skip_idle=True, max_llm_calls=None, max_workers=4):
+        """Rank channels by recent activity before any history is fetched
         
+        Returns {channel_id: plan}. Channels with nothing newer than `oldest`
+        are marked idle; with max_llm_calls set, the estimated Gemini calls
+        are granted to the most active channels first.
+        """
+        with self.metrics.timed('list'):
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                activity = list(executor.map(lambda ch: self.channel_activity(ch['id'], oldest), channels))
+        
+        plan = {}
+        for channel, (count, size, latest) in zip(channels, activity):
+            plan[channel['id']] = {
+                'name': channel['name'],
+                'idle': skip_idle and latest is not None and latest <= oldest,
+                'messages': count,
+                'latest': latest or 0,
+                'llm_calls': self.estimate_llm_calls(size),
+                'granted': True
+            }
+        active = sorted((p for p in plan.values() if not p['idle']), key=lambda p: (-p['messages'], -p['latest']))
+        self.log(f"📊 Activity check: {len(active)} active, {len(plan) - len(active)} idle channel(s)")
+        
+        if max_llm_calls is not None:
+            budget = max_llm_calls
+            for p in active:
+                p['granted'] = p['llm_calls'] <= budget
+                if p['granted']:
+                    budget -= p['llm_calls']
+            denied = [p['name'] for p in active if not p['granted']]
+            self.log(f"💰 LLM budget of {max_llm_calls} call(s): {len(active) - len(denied)} channel(s) summarized"
+                     + (f", over budget: {', '.join('#' + name for name in denied)}" if denied else ""))
+        return plan
+    
+    def stream_history(self, channel_id, oldest, latest=None):
+        """Yield compact records of a channel's messages newer than `oldest` (and older than `latest`)
+        as each page arrives (newest first)"""
+        kwargs = {'latest': str(latest)} if latest is not None else {}
+        pages = self.limiter.pages(
+            'conversations.history',
+            self.client.conversations_history,
+            channel=channel_id,
+            oldest=str(oldest),
+            limit=200,
+            **kwargs
+        )
+        for page, response in enumerate(pages, 1):
+            batch = response['messages']
+            self.log(f"    Page {page}: fetched {len(batch)} messages")
+            for msg in batch:
+                yield MessageRecord.from_slack(msg)
+    
+    def fetch_messages(self, channel_id, days_back=7, oldest=None):
+        """Sync new messages into the local store and return a lazy view of the last N days"""
+        if oldest is None:
+            oldest = (datetime.now() - timedelta(days=days_back)).timestamp()
+        
+        # Only ask Slack for what we haven't seen, re-reading a short overlap
+        # window so recent edits and deletions are picked up
+        state = self.store.get_sync_state(channel_id)
+        if state and state[0] <= oldest:
+            since = max(oldest, state[1] - SYNC_OVERLAP_SECONDS)
+            oldest_synced = state[0]
+            self.log(f"    Incremental sync since {datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M')}")
+        else:
+            since = oldest
+            oldest_synced = oldest
+        
+        # Records go to the store a page at a time, so only their ts strings
+        # are kept in memory however long the channel's history is
+        seen = set()
         try:
-            cursor = None
-            page = 0
+            stream = self.stream_history(channel_id, since)
             while True:
-                page += 1
-                response = self.client.conversations_history(
-                    channel=channel_id,
-                    oldest=str(oldest),
-                    limit=200,
-                    cursor=cursor
-                )
-                batch = response['messages']
-                messages.extend(batch)
-                self.log(f"    Page {page}: fetched {len(batch)} messages")
-                
-                cursor = response.get('response_metadata', {}).get('next_cursor')
-                if not cursor or len(messages) > 2000:
+                batch = list(islice(stream, 200))
+                if not batch:
                     break
-                    
+                self.store.save_messages(channel_id, batch)
+                seen.update(m.ts for m in batch)
+            self.store.finish_sync(channel_id, since, seen, oldest_synced)
+            if since > oldest:
+                self.refresh_thread_markers(channel_id, oldest, since)
         except SlackApiError as e:
             self.log(f"  Error fetching messages: {e}")
         
-        return messages
+        return self.store.history(channel_id, oldest)
+    
+    def refresh_thread_markers(self, channel_id, oldest, since):
+        """Re-read the part of the window an incremental sync skipped if it holds thread parents
+        
+        Replies don't change the parent's ts, so the sync's overlap misses new
+        replies to older threads; re-reading those history pages (one call per
+        200 messages) brings each parent's reply_count/latest_reply up to date,
+        and hydrate_threads() then fetches only the threads whose marker moved.
+        """
+        if not any(m.get('reply_count') and float(m.ts) <= since for m in self.store.history(channel_id, oldest)):
+            return
+        # One second of overlap with the sync, whose lower bound is exclusive
+        stream = self.stream_history(channel_id, oldest, latest=since + 1)
+        while True:
+            batch = list(islice(stream, 200))
+            if not batch:
+                break
+            self.store.save_messages(channel_id, batch)
     
     def fetch_thread_replies(self, channel_id, thread_ts):
-        """Fetch replies in a thread"""
+        """Fetch replies in a thread, following pagination up to max_thread_replies"""
+        replies = []
         try:
-            response = self.client.conversations_replies(
+            pages = self.limiter.pages(
+                'conversations.replies',
+                self.client.conversations_replies,
                 channel=channel_id,
                 ts=thread_ts,
-                limit=100
+                limit=200
             )
-            return response['messages'][1:] if len(response['messages']) > 1 else []
+            for response in pages:
+                # The parent message is repeated at the top of every page
+                replies.extend(MessageRecord.from_slack(m) for m in response['messages'] if m.get('ts') != thread_ts)
+                if len(replies) >= self.max_thread_replies:
+                    break
         except SlackApiError as e:
             self.log(f"  Error fetching thread: {e}")
-            return []
+            return None
+        return replies[:self.max_thread_replies]
+    
+    def cached_threads(self, channel_id, messages):
+        """Split thread parents into ({ts: stored replies}, [parents whose replies must be fetched])"""
+        threads = {}
+        missing = []
+        for msg in messages:
+            if msg.get('reply_count', 0) > 0 and msg.get('thread_ts', msg.get('ts')) == msg.get('ts'):
+                cached = self.store.get_thread_replies(channel_id, msg['ts'], msg.get('latest_reply', ''))
+                if cached is not None:
+                    threads[msg['ts']] = cached
+                else:
+                    missing.append(msg)
+        return threads, missing
+    
+    def hydrate_threads(self, channel_id, messages):
+        """Fetch replies for every thread parent concurrently, reusing unchanged threads"""
+        threads, missing = self.cached_threads(channel_id, messages)
+        to_fetch = [(msg['ts'], msg.get('latest_reply', '')) for msg in missing]
+        
+        if to_fetch:
+            self.log(f"    Fetching {len(to_fetch)} threads ({len(threads)} unchanged)")
+            with ThreadPoolExecutor(max_workers=self.thread_workers) as executor:
+                fetched = executor.map(self.metrics.bind(lambda t: self.fetch_thread_replies(channel_id, t[0])), to_fetch)
+                for (thread_ts, latest_reply), replies in zip(to_fetch, fetched):
+                    if replies is None:
+                        continue
+                    threads[thread_ts] = replies
+                    self.store.save_thread_replies(channel_id, thread_ts, latest_reply, replies)
+        
+        return threads
     
     def format_file_info(self, file_data):
         """Format file/attachment information"""
@@ -142,63 +403,91 @@ class SlackSummarizer:
             
         return info
     
-    def format_messages(self, messages, channel_name, channel_id):
-        """Format messages into readable text with all context"""
-        if not messages:
-            return None
-            
-        formatted = f"# Channel: {channel_name}\n\n"
+    def format_pieces(self, messages, threads=None):
+        """Yield each message formatted with its files, reactions and thread, in input order
         
-        messages.sort(key=lambda x: float(x.get('ts', 0)))
+        Skipped (system) messages yield an empty string. Consumes `messages`
+        lazily, so a stream goes straight from the store into chunking.
+        """
+        threads = threads or {}
+        get_user_name = self.get_user_name
+        format_file_info = self.format_file_info
         
         for msg in messages:
-            if msg.get('subtype') in ['channel_join', 'channel_leave', 'channel_archive']:
+            if msg.get('subtype') in SKIP_SUBTYPES:
+                yield ''
                 continue
             
-            user_id = msg.get('user', msg.get('bot_id', 'Unknown'))
-            username = self.get_user_name(user_id)
-            text = msg.get('text', '')
-            timestamp = datetime.fromtimestamp(float(msg.get('ts', 0))).strftime('%Y-%m-%d %H:%M')
+            ts = msg.get('ts', '0')
+            username = get_user_name(msg.get('user', msg.get('bot_id', 'Unknown')))
+            parts = [f"\n[{format_minute(int(float(ts)) // 60)}] **{username}**: {msg.get('text', '')}\n"]
+            append = parts.append
             
-            formatted += f"\n[{timestamp}] **{username}**: {text}\n"
+            files = msg.get('files')
+            if files:
+                for file_data in files:
+                    append(f"  {format_file_info(file_data)}\n")
             
-            if msg.get('files'):
-                for file_data in msg['files']:
-                    formatted += f"  {self.format_file_info(file_data)}\n"
-            
-            if msg.get('attachments'):
-                for att in msg['attachments']:
+            attachments = msg.get('attachments')
+            if attachments:
+                for att in attachments:
                     if att.get('title'):
-                        formatted += f"  🔗 {att['title']}\n"
+                        append(f"  🔗 {att['title']}\n")
                     if att.get('text'):
-                        formatted += f"     {att['text'][:150]}...\n"
+                        append(f"     {att['text'][:150]}...\n")
+            
+            reactions = msg.get('reactions')
+            if reactions:
+                reaction_text = ', '.join([f"{r['name']}({r['count']})" for r in reactions])
+                append(f"  Reactions: {reaction_text}\n")
             
-            if msg.get('reactions'):
-                reactions = ', '.join([f"{r['name']}({r['count']})" for r in msg['reactions']])
-                formatted += f"  Reactions: {reactions}\n"
+            thread_replies = threads.get(ts)
+            if thread_replies:
+                reply_count = max(len(thread_replies), msg.get('reply_count', 0))
+                append(f"  💬 Thread ({reply_count} replies):\n")
+                for reply in thread_replies[:5]:
+                    append(f"    ↳ {get_user_name(reply.get('user', 'Unknown'))}: {reply.get('text', '')[:100]}\n")
+                if reply_count > 5:
+                    append(f"    ↳ ... and {reply_count-5} more replies\n")
             
-            if msg.get('reply_count', 0) > 0 and not msg.get('thread_ts'):
-                thread_replies = self.fetch_thread_replies(channel_id, msg['ts'])
-                if thread_replies:
-                    formatted += f"  💬 Thread ({len(thread_replies)} replies):\n"
-                    for reply in thread_replies[:5]:
-                        reply_user = self.get_user_name(reply.get('user', 'Unknown'))
-                        reply_text = reply.get('text', '')[:100]
-                        formatted += f"    ↳ {reply_user}: {reply_text}\n"
-                    if len(thread_replies) > 5:
-                        formatted += f"    ↳ ... and {len(thread_replies)-5} more replies\n"
-        
-        return formatted
-    
-    def summarize_with_gemini(self, text, channel_name, message_count):
-        """Summarize text using Gemini API with comprehensive prompt"""
-        prompt = f"""You are analyzing a Slack channel's activity. Provide a comprehensive, detailed summary.
+            yield ''.join(parts)
+    
+    def estimate_tokens(self, text):
+        """Estimate prompt tokens locally (~4 characters per token for English chat)"""
+        return len(text) // 4 + 1
+    
+    def pack_chunks(self, pieces, max_tokens):
+        """Greedily pack ordered text pieces into chunks of at most max_tokens"""
+        max_chars = max_tokens * 4
+        chunks = []
+        current = []
+        size = 0
+        for piece in pieces:
+            # A single oversized piece is split hard rather than dropped
+            while len(piece) > max_chars:
+                if current:
+                    chunks.append(''.join(current))
+                    current, size = [], 0
+                chunks.append(piece[:max_chars])
+                piece = piece[max_chars:]
+            if size + len(piece) > max_chars and current:
+                chunks.append(''.join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+        if current:
+            chunks.append(''.join(current))
+        return chunks
+    
+    def build_summary_prompt(self, text, channel_name, message_count, content_label='Discussion Content'):
+        """Build the sectioned channel summary prompt"""
+        return f"""You are analyzing a Slack channel's activity. Provide a comprehensive, detailed summary.
 
 Channel: #{channel_name}
 Total Messages: {message_count}
 Time Period: Last 7 days
 
-Discussion Content:
+{content_label}:
 {text}
 
 Please provide a detailed summary with these sections:
@@ -231,169 +520,760 @@ Please provide a detailed summary with these sections:
 - Emerging patterns or trends
 
 Be detailed and specific. Include names, dates, and context where available."""
+    
+    def build_chunk_prompt(self, text, channel_name, part, total_parts):
+        """Build the map-stage prompt for one slice of a long transcript"""
+        return f"""You are taking notes on part {part} of {total_parts} of a Slack channel's activity (#{channel_name}).
+These notes will later be merged with notes from the other parts into one report.
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = self.model.generate_content(prompt)
-                return response.text
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 3
-                    self.log(f"  Retry {attempt + 1}/{max_retries} after {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    return f"⚠️ Error generating summary: {str(e)}\n\nRaw message count: {message_count}"
+Content:
+{text}
+
+Write concise but complete notes covering:
+- Topics discussed, with specifics and context
+- Who contributed what (use names)
+- Files, documents and links shared
+- Decisions, action items, owners and deadlines
+- Announcements
+
+Keep names, dates and concrete details. Do not add an introduction or conclusion."""
+    
+    def build_digest_prompt(self, text, days_back=7):
+        """Build the workspace digest prompt over per-channel summaries"""
+        return f"""You are writing an executive digest of a Slack workspace's activity over the last {days_back} days.
+Below are summaries of individual channels that were written earlier.
+
+Channel Summaries:
+{text}
+
+Write a concise digest with these sections:
+
+## 🧭 Highlights
+- The most important developments across the workspace
+
+## 🔗 Cross-Channel Topics
+- Topics that came up in more than one channel (name the channels)
+
+## ✅ Decisions
+- Decisions made, with the channel they were made in
+
+## 📌 Action Items
+- Tasks, owners and deadlines, with their channel
+
+## ⚠️ Risks & Open Questions
+- Blockers, incidents and unresolved questions
+
+Only use information from the summaries. Be specific and brief."""
+    
+    def generate(self, prompt):
+        """Run one Gemini generation through the response cache and rate limiter"""
+        key = cache_key(self.model_name, PROMPT_VERSION, prompt)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            self.metrics.add('llm', cache_hits=1)
+            return cached
+        # Hard stop in case plan_channels() underestimated
+        with self.llm_lock:
+            if self.max_llm_calls is not None and self.llm_calls >= self.max_llm_calls:
+                raise RuntimeError(f"LLM call budget of {self.max_llm_calls} exhausted")
+            self.llm_calls += 1
+        response = self.limiter.call('gemini.generate_content', self.get_model().generate_content, prompt)
+        self.llm_cache.put(key, response.text)
+        return response.text
+    
+    def summarize_chunks(self, chunks, channel_name, message_count):
+        """Summarize a transcript already packed into token-bounded chunks"""
+        try:
+            if len(chunks) == 1:
+                return self.generate(self.build_summary_prompt(chunks[0], channel_name, message_count))
+            
+            # Map: take notes on each chunk in parallel, keeping chronological order.
+            # Reduce: merge notes (hierarchically if they still don't fit) into the
+            # final sectioned summary.
+            tokens = sum(self.estimate_tokens(chunk) for chunk in chunks)
+            self.log(f"  🧩 #{channel_name}: Summarizing {len(chunks)} chunks (~{tokens} tokens)")
+            parts = chunks
+            while True:
+                total_parts = len(parts)
+                with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+                    notes = list(executor.map(
+                        self.metrics.bind(lambda item: self.generate(
+                            self.build_chunk_prompt(item[1], channel_name, item[0], total_parts))),
+                        enumerate(parts, 1)
+                    ))
+                merged = ''.join(f"### Part {i}\n{note}\n\n" for i, note in enumerate(notes, 1))
+                if self.estimate_tokens(merged) <= self.chunk_tokens:
+                    break
+                parts = self.pack_chunks([f"{note}\n\n" for note in notes], self.chunk_tokens)
+                if len(parts) >= len(notes):
+                    # Notes are not getting any shorter; merge what we have
+                    break
+                self.log(f"  🧩 #{channel_name}: Merging notes in {len(parts)} groups")
+            
+            return self.generate(self.build_summary_prompt(
+                merged, channel_name, message_count,
+                content_label='Notes on the discussion, in chronological parts'
+            ))
+        except Exception as e:
+            return f"{SUMMARY_ERROR_PREFIX}: {str(e)}\n\nRaw message count: {message_count}"
+    
+    def summarize_workspace(self, results, days_back=7):
+        """Digest the workspace from existing channel summaries; returns None if there are none
+        
+        Only the per-channel summaries are sent, so this is one small extra
+        call (a cache hit when no summary changed) rather than a second pass
+        over the transcripts.
+        """
+        pieces = [
+            f"### #{r['name']} ({r['message_count']} messages)\n{r['summary']}\n\n"
+            for r in results
+            if r['status'] == 'summarized' and r.get('summary')
+        ]
+        if not pieces:
+            return None
+        
+        self.log(f"🧭 Writing workspace digest from {len(pieces)} channel summaries...")
+        try:
+            with self.metrics.timed('llm'):
+                groups = self.pack_chunks(pieces, self.digest_tokens)
+                if len(groups) == 1:
+                    return self.generate(self.build_digest_prompt(groups[0], days_back))
+                # Too many channels for one prompt: digest groups of channels first
+                self.log(f"  🧩 Digesting {len(groups)} channel groups first")
+                with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+                    digests = list(executor.map(lambda g: self.generate(self.build_digest_prompt(g, days_back)), groups))
+                merged = ''.join(f"### Channel group {i}\n{d}\n\n" for i, d in enumerate(digests, 1))
+                return self.generate(self.build_digest_prompt(merged, days_back))
+        except Exception as e:
+            self.log(f"⚠️  Could not generate workspace digest: {e}")
+            return None
+    
+    def digest_section(self, results, days_back=7):
+        """Render the workspace digest as report lines (empty if there is nothing to digest)"""
+        digest = self.summarize_workspace(results, days_back)
+        if not digest:
+            return []
+        return ["## 🧭 Workspace Digest\n\n", f"{digest}\n\n", "---\n\n"]
+    
+    def fingerprint(self, history, threads):
+        """Fingerprint of everything a channel's summary depends on: messages, threads and settings"""
+        thread_state = sorted(
+            (thread_ts, len(replies), replies[-1].get('ts') if replies else None)
+            for thread_ts, replies in threads.items()
+        )
+        return history.fingerprint(
+            self.model_name, PROMPT_VERSION, self.chunk_tokens, self.max_thread_replies,
+            self.noise_filter.settings() if self.noise_filter else None,
+            thread_state
+        )
+    
+    def process_channel(self, channel, days_back=7, idx=1, total=1):
+        """Fetch, format and summarize a single channel"""
+        with self.metrics.channel(channel['id'], channel['name']):
+            return self.run_channel_stages(channel, days_back, idx, total)
     
-    def run(self, days_back=7, output_file='summaries/weekly_summary.md'):
-        """Main execution function"""
+    def run_channel_stages(self, channel, days_back=7, idx=1, total=1):
+        """Run the fetch/threads/users/format/llm stages for one channel, timing each"""
+        channel_name = channel['name']
+        channel_id = channel['id']
+        result = {
+            'name': channel_name,
+            'id': channel_id,
+            'status': 'empty',
+            'message_count': 0,
+            'summary': None
+        }
+        
+        self.log(f"\n[{idx}/{total}] Processing #{channel_name}...")
+        
+        # Anything a previous attempt of this run already finished is reused
+        entry = self.manifest.get(channel_id)
+        if self.manifest.reached(entry, 'summarized'):
+            self.log(f"  ↩️  #{channel_name}: Reusing result from the interrupted run")
+            result.update(status=entry['status'], message_count=entry['message_count'], summary=entry.get('summary'))
+            return result
+        
+        plan = self.channel_plan.get(channel_id, {})
+        # `history` is a lazy view over the store; each pass below streams it
+        if self.manifest.reached(entry, 'fetched'):
+            history = self.store.history(channel_id, self.manifest.oldest)
+        elif plan.get('idle'):
+            self.log(f"  💤 #{channel_name}: No activity in last {days_back} days, skipping history fetch")
+            self.manifest.update(channel_id, 'summarized', status='empty')
+            return result
+        else:
+            with self.metrics.timed('history'):
+                history = self.fetch_messages(channel_id, days_back, oldest=self.manifest.oldest)
+            self.manifest.update(
+                channel_id, 'fetched',
+                message_count=len(history),
+                latest_ts=history.latest_ts()
+            )
+        
+        message_count = len(history)
+        if not message_count:
+            self.log(f"  ⚠️  #{channel_name}: No messages found in last {days_back} days")
+            self.manifest.update(channel_id, 'summarized', status='empty')
+            return result
+        
+        result['message_count'] = message_count
+        self.log(f"  ✅ #{channel_name}: Found {message_count} total messages")
+        
+        with self.metrics.timed('threads'):
+            threads = self.hydrate_threads(channel_id, history)
+        
+        # Incremental mode: unchanged messages and threads (under the same
+        # prompt and filter settings) get last run's summary without any
+        # further work
+        fingerprint = None
+        if self.artifacts:
+            fingerprint = self.fingerprint(history, threads)
+            artifact = self.artifacts.get(channel_id)
+            if artifact and artifact.get('fingerprint') == fingerprint:
+                generated = datetime.fromtimestamp(artifact['generated_at']).strftime('%Y-%m-%d %H:%M')
+                self.log(f"  ♻️  #{channel_name}: Unchanged since {generated}, reusing its summary")
+                result.update(status=artifact['status'], summary=artifact['summary'])
+                self.manifest.update(channel_id, 'summarized', status=result['status'], summary=result['summary'])
+                return result
+        
+        with self.metrics.timed('users'):
+            authors = {m.get('user', m.get('bot_id')) for m in history}
+            for replies in threads.values():
+                authors.update(r.get('user', r.get('bot_id')) for r in replies)
+            self.users.resolve_missing(authors)
+        
+        # Records are streamed from the store, but the noise filter keeps the
+        # records it passes (fold notes are only known at the end) and the
+        # pieces hold the whole transcript, so memory here grows with the
+        # filtered prompt text rather than staying flat
+        with self.metrics.timed('format'):
+            kept, dropped, notes = self.noise_filter.apply(history) if self.noise_filter else (history, [], [])
+            # Pieces (one per message) are packed into prompt chunks as they are
+            pieces = [f"# Channel: {channel_name}\n\n"]
+            pieces.extend(self.format_pieces(kept, threads))
+            formatted_chars = sum(map(len, pieces))
+            if dropped:
+                # Only the dropped messages are formatted again, less the fold notes they turned into
+                saved = sum(len(piece.encode('utf-8')) for piece in self.format_pieces(dropped, threads)) - sum(
+                    len(note.encode('utf-8')) for note in notes)
+                self.metrics.add('format', filtered=len(dropped), bytes_saved=saved)
+                self.log(f"  🧹 #{channel_name}: Filtered {len(dropped)} noisy messages ({saved / 1024:.1f} KB of prompt)")
+        
+        if formatted_chars < 50:
+            self.log(f"  ⏭️  #{channel_name}: Skipping - no meaningful content after filtering")
+            result['status'] = 'system_only'
+            self.manifest.update(channel_id, 'summarized', status='system_only')
+            if fingerprint:
+                self.artifacts.save(result, fingerprint)
+            return result
+        
+        self.log(f"  📝 #{channel_name}: Formatted content length: {formatted_chars} characters")
+        self.manifest.update(channel_id, 'formatted', formatted_chars=formatted_chars)
+        
+        if not plan.get('granted', True):
+            self.log(f"  💰 #{channel_name}: Over the LLM call budget, skipping summary")
+            result['status'] = 'over_budget'
+            self.manifest.update(channel_id, 'summarized', status='over_budget')
+            return result
+        
+        self.log(f"  🤖 #{channel_name}: Generating AI summary...")
+        with self.metrics.timed('llm'):
+            chunks = self.pack_chunks(pieces, self.chunk_tokens)
+            del pieces
+            result['summary'] = self.summarize_chunks(chunks, channel_name, message_count)
+        if result['summary'].startswith(SUMMARY_ERROR_PREFIX):
+            # Left at 'formatted' so --resume retries it
+            result['status'] = 'failed'
+        else:
+            result['status'] = 'summarized'
+            self.manifest.update(channel_id, 'summarized', status='summarized', summary=result['summary'])
+            if fingerprint:
+                self.artifacts.save(result, fingerprint)
+        return result
+    
+    def render_channel_section(self, result, days_back=7):
+        """Render a processed channel as report lines"""
+        return render_channel_section(result, days_back)
+    
+    def run(self, days_back=7, output_file='summaries/weekly_summary.md', max_workers=4, resume=False,
+            metrics_file='.slack_cache/metrics.json', metrics_table=False,
+            shard_index=0, shard_count=1, partial_file=None, workspace=None,
+            skip_idle=True, max_llm_calls=None, digest=True,
+            incremental=False, artifacts_dir='summaries/channels', history_dir='summaries/history',
+            include=None, exclude=None):
+        """Main execution function
+        
+        With shard_count > 1 only the channels hashed to shard_index are
+        processed, and their results are also written to partial_file for
+        merge_partials() to combine with the other shards.
+        
+        Channels with no activity in the window are skipped without fetching
+        their history unless skip_idle is False; max_llm_calls caps Gemini
+        calls, spending them on the most active channels. With digest, a
+        workspace digest built from the channel summaries closes the report
+        (sharded runs leave it to the merge step).
+        
+        With incremental, each channel's summary is kept in artifacts_dir and
+        reused while the channel's messages are unchanged, and a dated copy
+        of the report is kept in history_dir.
+        
+        include/exclude are channel name or ID patterns (see filter_channels).
+        """
+        if self.model is None and not self.gemini_key:
+            raise ValueError("Missing required environment variables")
+        max_workers = max(1, int(max_workers))
+        self.max_llm_calls = max_llm_calls
+        self.llm_calls = 0
+        sharded = shard_count > 1
         self.log(f"\n{'='*60}")
         self.log(f"🚀 Starting Slack Summarization")
         self.log(f"📅 Period: Last {days_back} days")
+        if sharded:
+            self.log(f"🧩 Shard {shard_index + 1} of {shard_count}" + (f" ({workspace})" if workspace else ""))
+            # Shards running side by side must not share a manifest
+            root, ext = os.path.splitext(self.manifest.path)
+            self.manifest.path = f"{root}-shard-{shard_index}-of-{shard_count}{ext}"
+            # ... and do share one Slack token and Gemini key, so each gets its
+            # part of the rate limits ($SUMMARIZER_RATE_SHARE overrides the split)
+            self.limiter.share(float(os.environ.get('SUMMARIZER_RATE_SHARE', shard_count)))
         self.log(f"{'='*60}\n")
         
-        # ALWAYS create the output file
-        all_summaries = []
-        date_range = f"{(datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}"
+        oldest = (datetime.now() - timedelta(days=days_back)).timestamp()
+        resumed = self.manifest.start(days_back, oldest, resume=resume)
+        if resumed:
+            # Keep the window of the run being resumed so results stay consistent
+            oldest = self.manifest.oldest
+        
+        self.llm_cache.evict()
+        retention = max(days_back, STORE_RETENTION_DAYS)
+        self.store.prune((datetime.now() - timedelta(days=retention)).timestamp())
         
-        # Header
-        all_summaries.append(f"# 📊 Slack Weekly Summary Report\n\n")
-        all_summaries.append(f"**📅 Period:** {date_range}\n")
-        all_summaries.append(f"**🕐 Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        listed = self.get_channels()
+        all_channels = filter_channels(listed, include, exclude)
+        # (position in the full channel list, channel) for the channels this run handles
+        selected = select_shard(all_channels, shard_index, shard_count) if sharded else list(enumerate(all_channels, 1))
+        channels = [channel for _, channel in selected]
+        if sharded:
+            self.log(f"🧩 {len(channels)} of {len(all_channels)} channel(s) assigned to this shard")
+        self.artifacts = None
+        if incremental:
+            self.artifacts = ChannelArtifacts(
+                os.path.join(artifacts_dir, workspace) if workspace else artifacts_dir,
+                log=self.log
+            )
+            # A shard only sees its own channels, so only full runs can tell which
+            # are gone; --channels/--exclude only narrow this run, so prune against
+            # everything Slack listed
+            if listed and not sharded:
+                removed = self.artifacts.prune({c['id'] for c in listed})
+                if removed:
+                    self.log(f"🗑️  Removed {removed} summary artifact(s) of channels no longer listed")
+        if channels:
+            with self.metrics.timed('users'):
+                self.users.load()
+        
+        # ALWAYS create the output file
+        date_range = f"{datetime.fromtimestamp(oldest).strftime('%Y-%m-%d')} to {datetime.now().strftime('%Y-%m-%d')}"
+        header = [
+            f"# 📊 Slack Weekly Summary Report\n\n",
+            f"**📅 Period:** {date_range}\n",
+            f"**🕐 Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+            f"**📢 Total Channels Found:** {len(channels)}\n\n",
+            "---\n\n"
+        ]
         
-        channels = self.get_channels()
+        self.log(f"📝 Writing summary to: {output_file}")
+        writer = ReportWriter(output_file, log=self.log)
+        # Only continue the report of the run the manifest resumed
+        writer.open(header, days_back, resume=resumed and bool(channels))
         
-        all_summaries.append(f"**📢 Total Channels Found:** {len(channels)}\n\n")
-        all_summaries.append("---\n\n")
+        if not all_channels and listed:
+            patterns = ', '.join(f"`{p}`" for p in include or ['*'])
+            excluded = f" excluding {', '.join(f'`{p}`' for p in exclude)}" if exclude else ""
+            self.log(f"❌ None of the {len(listed)} listed channel(s) matched the channel filters")
+            writer.finish([
+                "## ⚠️ No Channels Matched\n\n",
+                f"None of the {len(listed)} channel(s) you are a member of matched {patterns}{excluded}.\n\n",
+                "**Debug Log:**\n```\n",
+                '\n'.join(self.debug_log),
+                "\n```\n"
+            ])
+            self.log(f"✅ Debug file saved to: {output_file}")
+            return output_file
         
-        if not channels:
+        if not all_channels:
             self.log("❌ No channels found!")
-            all_summaries.append("## ⚠️ No Channels Found\n\n")
-            all_summaries.append("**Possible reasons:**\n")
-            all_summaries.append("- You're not a member of any channels\n")
-            all_summaries.append("- Slack token doesn't have correct permissions\n")
-            all_summaries.append("- Token might be a Bot token instead of User token\n\n")
-            all_summaries.append("**Debug Log:**\n```\n")
-            all_summaries.append('\n'.join(self.debug_log))
-            all_summaries.append("\n```\n")
-            
-            # Still save the file!
-            output_dir = os.path.dirname(output_file)
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.writelines(all_summaries)
+            writer.finish([
+                "## ⚠️ No Channels Found\n\n",
+                "**Possible reasons:**\n",
+                "- You're not a member of any channels\n",
+                "- Slack token doesn't have correct permissions\n",
+                "- Token might be a Bot token instead of User token\n\n",
+                "**Debug Log:**\n```\n",
+                '\n'.join(self.debug_log),
+                "\n```\n"
+            ])
             self.log(f"✅ Debug file saved to: {output_file}")
             return output_file
         
-        channels_processed = 0
-        total_messages = 0
+        pending = [(idx, ch) for idx, ch in selected if ch['id'] not in writer.completed]
+        if len(pending) < len(channels):
+            self.log(f"⏭️  Skipping {len(channels) - len(pending)} channel(s) already in the report")
+        positions = {ch['id']: idx for idx, ch in selected}
+        channel_results = []
+        digest = digest and not sharded
         
-        for idx, channel in enumerate(channels, 1):
-            channel_name = channel['name']
-            channel_id = channel['id']
-            
-            self.log(f"\n[{idx}/{len(channels)}] Processing #{channel_name}...")
-            
-            messages = self.fetch_messages(channel_id, days_back)
-            
-            if not messages:
-                self.log(f"  ⚠️  No messages found in last {days_back} days")
-                all_summaries.append(f"## #{channel_name}\n\n")
-                all_summaries.append(f"⚠️ No messages in the last {days_back} days\n\n")
-                all_summaries.append("---\n\n")
-                continue
-            
-            self.log(f"  ✅ Found {len(messages)} total messages")
-            
-            formatted_text = self.format_messages(messages, channel_name, channel_id)
-            
-            if not formatted_text or len(formatted_text) < 50:
-                self.log(f"  ⏭️  Skipping - no meaningful content after filtering")
-                all_summaries.append(f"## #{channel_name}\n\n")
-                all_summaries.append(f"**Messages found:** {len(messages)} (all were system messages)\n\n")
-                all_summaries.append("---\n\n")
-                continue
-            
-            self.log(f"  📝 Formatted content length: {len(formatted_text)} characters")
-            
-            if len(formatted_text) > 25000:
-                self.log(f"  ⚠️  Truncating content (too long for API)")
-                formatted_text = formatted_text[:25000] + "\n\n... (content truncated for API limits)"
-            
-            self.log(f"  🤖 Generating AI summary...")
-            summary = self.summarize_with_gemini(formatted_text, channel_name, len(messages))
-            
-            all_summaries.append(f"## #{channel_name}\n\n")
-            all_summaries.append(f"**Message Count:** {len(messages)}\n\n")
-            all_summaries.append(f"{summary}\n\n")
-            all_summaries.append("---\n\n")
-            
-            channels_processed += 1
-            total_messages += len(messages)
-            
-            time.sleep(3)
+        if skip_idle or max_llm_calls is not None:
+            to_plan = [ch for _, ch in pending if not self.manifest.reached(self.manifest.get(ch['id']), 'summarized')]
+            # Keep one call back for the digest
+            channel_budget = max(0, max_llm_calls - 1) if digest and max_llm_calls is not None else max_llm_calls
+            self.channel_plan = self.plan_channels(to_plan, oldest, skip_idle, channel_budget, max_workers)
         
-        # Summary statistics
-        all_summaries.append(f"\n## 📈 Summary Statistics\n\n")
-        all_summaries.append(f"- **Total Channels Found:** {len(channels)}\n")
-        all_summaries.append(f"- **Channels Processed:** {channels_processed}\n")
-        all_summaries.append(f"- **Total Messages Analyzed:** {total_messages}\n")
-        all_summaries.append(f"- **Average Messages per Channel:** {total_messages/channels_processed if channels_processed > 0 else 0:.1f}\n\n")
+        # Channels are processed concurrently, but executor.map yields results
+        # in submission order so the report keeps the original channel order.
+        # Each section is flushed to disk as soon as it is next in line.
+        self.log(f"⚙️  Processing channels with {max_workers} worker(s)")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda item: self.process_channel(item[1], days_back, item[0], len(all_channels)),
+                pending
+            )
+            for result in results:
+                writer.write_section(
+                    result['id'],
+                    result['status'],
+                    result['message_count'],
+                    self.render_channel_section(result, days_back)
+                )
+                if result['status'] != 'failed':
+                    self.manifest.update(result['id'], 'written')
+                channel_results.append(dict(result, position=positions[result['id']]))
         
-        # Add debug log at the end
-        all_summaries.append(f"## 🔍 Debug Log\n\n```\n")
-        all_summaries.append('\n'.join(self.debug_log[-50:]))  # Last 50 log entries
-        all_summaries.append("\n```\n")
+        channels_processed, total_messages = writer.stats()
         
-        # FORCE file creation
-        output_dir = os.path.dirname(output_file)
-        self.log(f"\n📝 Saving summary to: {output_file}")
-        self.log(f"   Output directory: {output_dir or 'current directory'}")
+        # Sections skipped on resume are taken from the manifest
+        processed_ids = {r['id'] for r in channel_results}
+        for channel in channels:
+            if channel['id'] in writer.completed and channel['id'] not in processed_ids:
+                entry = self.manifest.get(channel['id'])
+                status, message_count = writer.completed[channel['id']]
+                channel_results.append({
+                    'id': channel['id'],
+                    'name': channel['name'],
+                    'position': positions[channel['id']],
+                    'status': status,
+                    'message_count': message_count,
+                    'summary': entry.get('summary')
+                })
+        channel_results.sort(key=lambda r: r['position'])
         
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-            self.log(f"   ✅ Directory created/verified")
+        if sharded:
+            partial_file = partial_file or default_partial_path(workspace, shard_index, shard_count)
+            write_partial(partial_file, workspace, shard_index, shard_count, days_back, oldest,
+                          len(all_channels), channel_results)
+            self.log(f"🧩 Partial result written to: {partial_file}")
         
-        self.log(f"   Writing {len(all_summaries)} lines to file...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.writelines(all_summaries)
+        digest_lines = self.digest_section(channel_results, days_back) if digest else []
         
-        # Verify
-        if os.path.exists(output_file):
-            file_size = os.path.getsize(output_file)
-            self.log(f"   ✅ File created! Size: {file_size} bytes")
-            
-            # Print first few lines
-            with open(output_file, 'r') as f:
-                preview = f.read(500)
-            self.log(f"\n📄 File preview:\n{preview}...")
-        else:
-            self.log(f"   ❌ ERROR: File was NOT created!")
-            self.log(f"   Current working directory: {os.getcwd()}")
-            self.log(f"   Files in current directory: {os.listdir('.')}")
+        self.manifest.complete()
         
         self.log(f"\n{'='*60}")
         self.log(f"✅ Process completed!")
         self.log(f"📊 Processed {channels_processed} channels with {total_messages} total messages")
+        self.log(f"💾 LLM cache: {self.llm_cache.hits} hits, {self.llm_cache.misses} misses")
+        if metrics_table:
+            self.log(f"\n⏱️  Stage metrics:\n{self.metrics.format_table()}")
+        if metrics_file:
+            self.metrics.write_json(metrics_file)
+            self.log(f"📈 Metrics written to: {metrics_file}")
         self.log(f"{'='*60}\n")
         
+        # Summary statistics and the tail of the debug log close the report
+        writer.finish(digest_lines + [
+            f"\n## 📈 Summary Statistics\n\n",
+            f"- **Total Channels Found:** {len(channels)}\n",
+            f"- **Channels Processed:** {channels_processed}\n",
+            f"- **Total Messages Analyzed:** {total_messages}\n",
+            f"- **Average Messages per Channel:** {total_messages/channels_processed if channels_processed > 0 else 0:.1f}\n\n",
+            f"## 🔍 Debug Log\n\n```\n",
+            '\n'.join(list(self.debug_log)[-50:]),  # Last 50 log entries
+            "\n```\n"
+        ])
+        self.log(f"   ✅ File written! Size: {os.path.getsize(output_file)} bytes")
+        if incremental and not sharded:
+            self.log(f"🗂️  Report archived to: {archive_report(output_file, history_dir)}")
+        
         return output_file
+    
+    def estimate_channel(self, channel, days_back, oldest):
+        """Count the messages, prompt tokens and Gemini calls one channel would need"""
+        channel_id = channel['id']
+        row = {
+            'name': channel['name'],
+            'id': channel_id,
+            'status': 'empty',
+            'message_count': 0,
+            'thread_fetches': 0,
+            'tokens': 0,
+            'llm_calls': 0
+        }
+        plan = self.channel_plan.get(channel_id, {})
+        if plan.get('idle'):
+            row['status'] = 'idle'
+            return row
+        
+        with self.metrics.timed('history'):
+            history = self.fetch_messages(channel_id, days_back, oldest=oldest)
+        row['message_count'] = len(history)
+        if not row['message_count']:
+            return row
+        
+        # Threads are not fetched; replies not in the store yet are sized as
+        # the (at most five) preview lines format_pieces() would add
+        threads, missing = self.cached_threads(channel_id, history)
+        row['thread_fetches'] = len(missing)
+        
+        if self.artifacts and not missing:
+            artifact = self.artifacts.get(channel_id)
+            if artifact and artifact.get('fingerprint') == self.fingerprint(history, threads):
+                row['status'] = 'reused'
+                return row
+        kept = self.noise_filter.apply(history)[0] if self.noise_filter else history
+        pieces = [f"# Channel: {channel['name']}\n\n"]
+        pieces.extend(self.format_pieces(kept, threads))
+        chars = sum(map(len, pieces)) + sum(
+            THREAD_LINE_CHARS * (1 + min(5, m.get('reply_count', 0))) for m in missing)
+        row['tokens'] = chars // 4 + 1
+        if chars < 50:
+            row['status'] = 'system_only'
+            return row
+        if not plan.get('granted', True):
+            row['status'] = 'over_budget'
+            return row
+        
+        chunks = max(len(self.pack_chunks(pieces, self.chunk_tokens)), math.ceil(row['tokens'] / self.chunk_tokens))
+        row['status'] = 'summarized'
+        row['llm_calls'] = 1 if chunks == 1 else chunks + 1
+        return row
+    
+    def estimate(self, days_back=7, max_workers=4, include=None, exclude=None, skip_idle=True,
+                 max_llm_calls=None, digest=True, incremental=False, artifacts_dir='summaries/channels',
+                 workspace=None):
+        """Predict a run's messages, prompt tokens, Gemini calls and runtime without generating anything
+        
+        Channel history is synced into the local store (so the real run starts
+        warm), but threads are not fetched, Gemini is never called and no
+        report or manifest is written. Takes the same channel options as run();
+        returns the totals with one row per channel.
+        """
+        max_workers = max(1, int(max_workers))
+        oldest = (datetime.now() - timedelta(days=days_back)).timestamp()
+        self.log(f"🔎 Estimating a {days_back}-day run")
+        channels = filter_channels(self.get_channels(), include, exclude)
+        self.artifacts = None
+        if incremental:
+            self.artifacts = ChannelArtifacts(
+                os.path.join(artifacts_dir, workspace) if workspace else artifacts_dir,
+                log=self.log
+            )
+        if channels:
+            self.users.load()
+        
+        self.channel_plan = {}
+        if skip_idle or max_llm_calls is not None:
+            channel_budget = max(0, max_llm_calls - 1) if digest and max_llm_calls is not None else max_llm_calls
+            self.channel_plan = self.plan_channels(channels, oldest, skip_idle, channel_budget, max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(
+                self.metrics.bind(lambda ch: self.estimate_channel(ch, days_back, oldest)),
+                channels
+            ))
+        
+        summaries = sum(1 for r in rows if r['status'] in ('summarized', 'reused'))
+        totals = {
+            'channels': len(rows),
+            'message_count': sum(r['message_count'] for r in rows),
+            'thread_fetches': sum(r['thread_fetches'] for r in rows),
+            'tokens': sum(r['tokens'] for r in rows if r['status'] == 'summarized'),
+            'llm_calls': sum(r['llm_calls'] for r in rows) + (1 if digest and summaries else 0)
+        }
+        # Thread fetches and Gemini calls overlap, so the slower of the two
+        # rate limits bounds the run
+        totals['minutes'] = max(
+            totals['llm_calls'] / self.limiter.limits.get('gemini.generate_content', 30),
+            totals['thread_fetches'] / self.limiter.limits.get('conversations.replies', 50)
+        )
+        
+        lines = [f"{'channel':<32}{'messages':>10}{'threads':>9}{'tokens':>10}{'LLM calls':>11}  status"]
+        for r in rows:
+            if r['status'] != 'idle':
+                lines.append(f"{'#' + r['name']:<32}{r['message_count']:>10}{r['thread_fetches']:>9}"
+                             f"{r['tokens']:>10}{r['llm_calls']:>11}  {r['status']}")
+        idle = sum(1 for r in rows if r['status'] == 'idle')
+        lines.append(f"{'total':<32}{totals['message_count']:>10}{totals['thread_fetches']:>9}"
+                     f"{totals['tokens']:>10}{totals['llm_calls']:>11}"
+                     + ("  (incl. 1 digest call)" if digest and summaries else ""))
+        if idle:
+            lines.append(f"{idle} idle channel(s) not shown")
+        self.log(f"\n{'='*60}")
+        self.log('\n'.join(lines))
+        self.log(f"\n⏱️  At least {totals['minutes']:.1f} min at the Gemini and thread rate limits; "
+                 f"~{totals['tokens']} prompt tokens before chunk notes and the digest")
+        self.log(f"{'='*60}\n")
+        totals['rows'] = rows
+        return totals
 
-if __name__ == "__main__":
+def build_parser():
+    """Command-line options; defaults come from the SUMMARIZER_* environment variables"""
+    parser = argparse.ArgumentParser(description="Summarize recent Slack channel activity with Gemini")
+    parser.add_argument('--days', type=int, default=int(os.environ.get('SUMMARIZER_DAYS', '30')),
+                        help="summarize this many days back (default: $SUMMARIZER_DAYS or 30)")
+    parser.add_argument('--channels', nargs='+', metavar='PATTERN',
+                        help="only these channels: names or IDs, shell-style globs allowed (e.g. 'eng-*')")
+    parser.add_argument('--exclude', nargs='+', metavar='PATTERN',
+                        help="skip channels matching any of these names, IDs or globs")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SUMMARIZER_MAX_WORKERS', '4')),
+                        help="channels processed concurrently (default: $SUMMARIZER_MAX_WORKERS or 4)")
+    parser.add_argument('--estimate', action='store_true',
+                        help="only list channels and count messages, tokens and Gemini calls to predict "
+                             "runtime and cost; nothing is generated or written")
+    parser.add_argument('--output',
+                        help="markdown report to write (default: summaries/weekly_summary.md, "
+                             "or next to the partial result when sharded)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run, reusing fetched messages and finished summaries")
+    parser.add_argument('--metrics', default=None,
+                        help="write per-channel, per-stage timings and API counters to this JSON file "
+                             "(default: metrics.json in the cache directory)")
+    parser.add_argument('--metrics-table', action='store_true',
+                        help="also print a stage/channel timing table at the end of the run")
+    parser.add_argument('--workspace',
+                        help="label for this workspace; keeps its caches in .slack_cache/<workspace>")
+    parser.add_argument('--token-env', default='SLACK_USER_TOKEN',
+                        help="environment variable holding this workspace's Slack user token")
+    parser.add_argument('--shard-index', type=int, default=0,
+                        help="which shard of the channels to process (0-based)")
+    parser.add_argument('--shard-count', type=int, default=1,
+                        help="split channels across this many shards by hashing the channel ID")
+    parser.add_argument('--partial',
+                        help="where a shard writes its partial result (default: summaries/partials/)")
+    parser.add_argument('--merge', nargs='+', metavar='PARTIAL',
+                        help="merge shard partial results into --output instead of running")
+    parser.add_argument('--incremental', action='store_true',
+                        help="reuse each channel's stored summary while its messages are unchanged, "
+                             "and keep a dated copy of every report")
+    parser.add_argument('--artifacts-dir', default='summaries/channels',
+                        help="where --incremental keeps per-channel summaries (default: summaries/channels)")
+    parser.add_argument('--history-dir', default='summaries/history',
+                        help="where --incremental keeps dated reports (default: summaries/history)")
+    parser.add_argument('--no-digest', dest='digest', action='store_false',
+                        help="don't close the report with a cross-channel workspace digest")
+    parser.add_argument('--slack-backend', choices=['sync', 'async'],
+                        default=os.environ.get('SUMMARIZER_SLACK_BACKEND', 'sync'),
+                        help="Slack client: sync WebClient, or AsyncWebClient over one pooled keep-alive session")
+    parser.add_argument('--no-noise-filter', dest='noise_filter', action='store_false',
+                        help="send every message to Gemini instead of folding repeats and bot bursts")
+    parser.add_argument('--no-skip-idle', dest='skip_idle', action='store_false',
+                        help="fetch history even for channels with no recent activity")
+    parser.add_argument('--max-llm-calls', type=int,
+                        default=int(os.environ['SUMMARIZER_MAX_LLM_CALLS']) if os.environ.get('SUMMARIZER_MAX_LLM_CALLS') else None,
+                        help="cap Gemini calls per run, summarizing the most active channels first "
+                             "(default: $SUMMARIZER_MAX_LLM_CALLS or unlimited)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.merge:
+        digest = None
+        if args.digest and os.environ.get('GEMINI_API_KEY'):
+            # Merging only needs Gemini (for the digest), never the Slack token
+            digest = SlackSummarizer(client=WebClient()).digest_section
+        output = merge_partials(args.merge, args.output or 'summaries/weekly_summary.md', digest=digest)
+        if args.incremental:
+            print(f"🗂️  Report archived to: {archive_report(output, args.history_dir)}")
+        return 0
+    
+    cache_dir = os.path.join('.slack_cache', args.workspace) if args.workspace else None
+    if args.estimate:
+        summarizer = SlackSummarizer(token_env=args.token_env, cache_dir=cache_dir, backend=args.slack_backend)
+        if not args.noise_filter:
+            summarizer.noise_filter = None
+        try:
+            summarizer.estimate(
+                days_back=args.days,
+                max_workers=args.workers,
+                include=args.channels,
+                exclude=args.exclude,
+                skip_idle=args.skip_idle,
+                max_llm_calls=args.max_llm_calls,
+                digest=args.digest,
+                incremental=args.incremental,
+                artifacts_dir=args.artifacts_dir,
+                workspace=args.workspace
+            )
+        finally:
+            summarizer.close()
+        return 0
+    
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    if args.shard_count > 1:
+        args.partial = args.partial or default_partial_path(args.workspace, args.shard_index, args.shard_count)
+        args.output = args.output or os.path.splitext(args.partial)[0] + '.md'
+    args.output = args.output or 'summaries/weekly_summary.md'
+    
+    summarizer = None
     try:
-        summarizer = SlackSummarizer()
-        result = summarizer.run(days_back=30)  # Changed to 30 days for better chance of finding messages
+        summarizer = SlackSummarizer(token_env=args.token_env, cache_dir=cache_dir, backend=args.slack_backend)
+        if not args.noise_filter:
+            summarizer.noise_filter = None
+        result = summarizer.run(
+            days_back=args.days,
+            output_file=args.output,
+            max_workers=args.workers,
+            resume=args.resume,
+            metrics_file=args.metrics or os.path.join(summarizer.cache_dir, 'metrics.json'),
+            metrics_table=args.metrics_table,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            partial_file=args.partial,
+            workspace=args.workspace,
+            skip_idle=args.skip_idle,
+            max_llm_calls=args.max_llm_calls,
+            digest=args.digest,
+            incremental=args.incremental,
+            artifacts_dir=args.artifacts_dir,
+            history_dir=args.history_dir,
+            include=args.channels,
+            exclude=args.exclude
+        )
         print(f"\n✅ SUCCESS! Summary file: {result}")
     except Exception as e:
         print(f"\n❌ FATAL ERROR: {e}")
         import traceback
         traceback.print_exc()
         
-        # Create error file
-        os.makedirs('summaries', exist_ok=True)
-        with open('summaries/weekly_summary.md', 'w') as f:
+        # Create error file, appending only to an unfinished report so it stays
+        # resumable; a finished report from an earlier run is replaced
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, 'a' if is_partial_report(args.output) else 'w') as f:
             f.write(f"# ❌ Error Running Summarizer\n\n")
             f.write(f"**Error:** {str(e)}\n\n")
             f.write(f"**Traceback:**\n```\n{traceback.format_exc()}\n```\n")
-        print("Error details saved to summaries/weekly_summary.md")
+        print(f"Error details saved to {args.output}")
+    finally:
+        # Also on failure, so the async backend's session and loop thread are released
+        if summarizer is not None:
+            summarizer.close()
+    # The error report is the run's output, so a failed run still exits 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
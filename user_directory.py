@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from slack_sdk.errors import SlackApiError
+
+from atomic_write import write_json
+
+
+def display_name(user):
+    """Pick the best human-readable name from a users.list/users.info record"""
+    profile = user.get('profile', {})
+    return profile.get('display_name') or profile.get('real_name') or user.get('name') or user.get('id')
+
+
+class UserDirectory:
+    """Workspace user and bot names, bulk-loaded once and cached on disk with a TTL"""
+
+    def __init__(self, client, limiter, path='.slack_cache/users.json', ttl_hours=24, log=print):
+        self.client = client
+        self.limiter = limiter
+        self.path = path
+        self.ttl = ttl_hours * 60 * 60
+        self.log = log
+        self.names = {}
+        self.fetched_at = 0
+        # IDs that failed to resolve this run; kept out of the on-disk cache so
+        # they are retried next time instead of sticking as raw IDs forever
+        self.failed = set()
+        self.lock = threading.Lock()
+        # Serialises network lookups so concurrent channels don't resolve the same ID twice
+        self.resolve_lock = threading.Lock()
+
+    def load(self):
+        """Load the cached directory, refreshing it from users.list if stale"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.names = data.get('names', {})
+                self.fetched_at = data.get('fetched_at', 0)
+            except (OSError, ValueError) as e:
+                self.log(f"  ⚠️  Ignoring unreadable user cache: {e}")
+
+        age = time.time() - self.fetched_at
+        if age > self.ttl:
+            self.refresh()
+        else:
+            self.log(f"👥 Loaded {len(self.names)} cached user names ({age/3600:.1f}h old)")
+
+    def refresh(self):
+        """Page through users.list and merge the results into the directory"""
+        fetched = {}
+        try:
+            for response in self.limiter.pages('users.list', self.client.users_list, limit=200):
+                for user in response['members']:
+                    fetched[user['id']] = display_name(user)
+        except SlackApiError as e:
+            self.log(f"  ⚠️  Could not refresh user directory: {e}")
+            return
+
+        # Merge rather than replace so bots and departed users stay resolvable
+        with self.lock:
+            self.names.update(fetched)
+            self.fetched_at = time.time()
+        self.log(f"👥 Loaded {len(fetched)} users from users.list")
+        self.save()
+
+    def save(self):
+        """Write the directory to disk atomically"""
+        with self.lock:
+            data = {'fetched_at': self.fetched_at, 'names': dict(self.names)}
+        write_json(self.path, data)
+
+    def lookup(self, user_id):
+        """Resolve one user or bot ID over the network"""
+        if user_id.startswith('B'):
+            response = self.limiter.call('bots.info', self.client.bots_info, bot=user_id)
+            return response['bot'].get('name') or user_id
+        response = self.limiter.call('users.info', self.client.users_info, user=user_id)
+        return display_name(response['user'])
+
+    def resolve_missing(self, user_ids):
+        """Look up any IDs not in the directory (new users, bots) before formatting"""
+        with self.resolve_lock:
+            with self.lock:
+                missing = {u for u in user_ids if u and u not in self.names and u not in self.failed}
+            if not missing:
+                return
+
+            for user_id in sorted(missing):
+                try:
+                    name = self.lookup(user_id)
+                except SlackApiError:
+                    with self.lock:
+                        self.failed.add(user_id)
+                    continue
+                with self.lock:
+                    self.names[user_id] = name
+            self.save()
+
+    def name(self, user_id):
+        """Return the cached name for an ID, falling back to the ID itself"""
+        return self.names.get(user_id, user_id)